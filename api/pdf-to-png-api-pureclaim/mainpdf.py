@@ -1,66 +1,1764 @@
 import os
 import io
+import json
 import base64
-import requests
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+import asyncio
+import tempfile
+import hashlib
+import threading
+import re
+import math
+import time
+import uuid
+import zipfile
+import weakref
+import contextvars
+import collections
+import multiprocessing
+from dataclasses import dataclass
+from typing import List, Literal, Optional, Union
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager, contextmanager
+import httpx
+from fastapi import FastAPI, File, Header, HTTPException, Request, UploadFile
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from starlette.background import BackgroundTask
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
 from colorama import Fore, Style
 import fitz  # PyMuPDF
 from PIL import Image
 
-app = FastAPI()
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx when installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
-class PDFRequest(BaseModel):
+# Download client settings, overridable per deployment
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+
+# Render pool settings: "process" uses every core; "thread" renders one task
+# at a time on a single thread, and is also used when processes cannot start
+RENDER_EXECUTOR = os.getenv("RENDER_EXECUTOR", "process")
+if RENDER_EXECUTOR != "thread":
+    try:
+        # AWS Lambda (Vercel) has no /dev/shm, so process pools cannot create their locks
+        multiprocessing.Lock()
+    except (OSError, ImportError, NotImplementedError):
+        RENDER_EXECUTOR = "thread"
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(os.cpu_count() or 1)))
+# Tasks that actually run at once; PyMuPDF is not thread-safe, so the thread
+# pool has a single thread
+RENDER_POOL_SIZE = RENDER_WORKERS if RENDER_EXECUTOR != "thread" else 1
+RENDER_QUEUE_DEPTH = int(os.getenv("RENDER_QUEUE_DEPTH", str(RENDER_POOL_SIZE * 2)))
+RENDER_QUEUE_TIMEOUT = float(os.getenv("RENDER_QUEUE_TIMEOUT", "30"))
+RENDER_CHUNK_PAGES = int(os.getenv("RENDER_CHUNK_PAGES", "8"))
+RENDER_DOC_PARALLELISM = int(os.getenv("RENDER_DOC_PARALLELISM", str(RENDER_POOL_SIZE)))
+# Streamed responses: most pages rendered or rendering ahead of the client
+STREAM_BUFFER_PAGES = int(os.getenv("STREAM_BUFFER_PAGES", str(RENDER_POOL_SIZE * 2)))
+
+# Render cache: in-memory LRU plus an optional on-disk tier
+RENDER_CACHE_BYTES = int(os.getenv("RENDER_CACHE_BYTES", str(256 * 1024 * 1024)))
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR") or None
+RENDER_CACHE_DISK_BYTES = int(os.getenv("RENDER_CACHE_DISK_BYTES", str(2 * 1024 * 1024 * 1024)))
+PAGE_COUNT_CACHE_SIZE = 1024
+
+# Downloads and uploads stay in memory up to SPOOL_THRESHOLD bytes, then go
+# to a temp file; anything over MAX_PDF_BYTES is refused
+SPOOL_THRESHOLD = int(os.getenv("SPOOL_THRESHOLD", str(16 * 1024 * 1024)))
+MAX_PDF_BYTES = int(os.getenv("MAX_PDF_BYTES", str(200 * 1024 * 1024)))
+# In-memory PDFs above this size are written to a temp file once so process
+# workers can open them by path
+SHARE_BY_PATH_BYTES = int(os.getenv("SHARE_BY_PATH_BYTES", str(1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Batch endpoint: documents converted at once, and the most per call
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+# Async jobs: queue and records live in this process or, with
+# JOB_STORE_URL=redis://..., in Redis so any worker can run jobs and answer polls
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "1000"))
+JOB_TTL = int(os.getenv("JOB_TTL", "3600"))
+JOB_STORE_URL = os.getenv("JOB_STORE_URL") or None
+# Largest result a job may produce (base64 images and text); bigger jobs
+# fail with a 413 as soon as they cross it
+JOB_MAX_RESULT_BYTES = int(os.getenv("JOB_MAX_RESULT_BYTES", str(128 * 1024 * 1024)))
+# In-memory store only: total size of kept results, oldest dropped first
+JOB_RESULT_BYTES = int(os.getenv("JOB_RESULT_BYTES", str(512 * 1024 * 1024)))
+
+# mode=auto: pages with fewer characters than this, or mostly image with
+# little text, are rendered; the rest return their text layer
+AUTO_MIN_TEXT_CHARS = int(os.getenv("AUTO_MIN_TEXT_CHARS", "20"))
+AUTO_IMAGE_COVERAGE = float(os.getenv("AUTO_IMAGE_COVERAGE", "0.5"))
+AUTO_MIN_TEXT_COVERAGE = float(os.getenv("AUTO_MIN_TEXT_COVERAGE", "0.05"))
+
+# passthrough: minimum share of the page the embedded image must cover
+PASSTHROUGH_MIN_COVERAGE = float(os.getenv("PASSTHROUGH_MIN_COVERAGE", "0.95"))
+
+# Smallest tile_size accepted, to keep per-tile overhead reasonable
+MIN_TILE_SIZE = int(os.getenv("MIN_TILE_SIZE", "256"))
+
+# Download cache: PDFs by URL, revalidated with ETag / Last-Modified
+DOWNLOAD_CACHE_BYTES = int(os.getenv("DOWNLOAD_CACHE_BYTES", str(512 * 1024 * 1024)))
+
+# Prometheus metrics, served at /metrics
+STAGE_SECONDS = Histogram(
+    "pdf_stage_seconds", "Time spent per conversion stage", ["stage"],
+    buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60),
+)
+PAGES_RENDERED = Counter("pdf_pages_rendered_total", "Pages rasterized (cache misses)")
+BYTES_IN = Counter("pdf_bytes_in_total", "PDF bytes downloaded or uploaded")
+BYTES_OUT = Counter("pdf_image_bytes_out_total", "Encoded image bytes returned")
+
+_stage_timings = contextvars.ContextVar("stage_timings", default=None)
+
+def record_stage(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    timings = _stage_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+@contextmanager
+def stage_timer(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+_http_client = None
+_render_executor = None
+_render_slots = asyncio.Semaphore(RENDER_QUEUE_DEPTH)
+_page_counts = collections.OrderedDict()
+_job_workers = []
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide download client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        )
+    return _http_client
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if JOB_STORE_URL:
+        # Jobs queued through any process may be waiting in Redis
+        start_job_workers()
+    yield
+    if _http_client is not None:
+        await _http_client.aclose()
+    for worker in _job_workers:
+        worker.cancel()
+    _job_workers.clear()
+    global _render_executor
+    if _render_executor is not None:
+        _render_executor.shutdown(cancel_futures=True)
+        _render_executor = None
+
+app = FastAPI(lifespan=lifespan)
+
+class StageTimingMiddleware:
+    """Give every HTTP request its own dict for ``stage_timer`` totals."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            _stage_timings.set({})
+        await self.app(scope, receive, send)
+
+app.add_middleware(StageTimingMiddleware)
+
+RESPONSE_MEDIA_TYPES = {
+    "zip": "application/zip",
+    "multipart": "multipart/mixed",
+    "ndjson": "application/x-ndjson",
+}
+
+IMAGE_MIME_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+TEXT_MIME_TYPE = "text/plain; charset=utf-8"
+IMAGE_EXTENSIONS = {
+    TEXT_MIME_TYPE: "txt",
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+}
+
+class RenderParams(BaseModel):
+    """Rendering and response settings shared by every conversion endpoint."""
+    zoom: Optional[float] = None  # Defaults to 2 unless dpi or a max_* target is set
+    dpi: Optional[float] = None  # Overrides zoom; 72 dpi == zoom 1
+    # Output size targets, applied per page. Alone they scale each page to
+    # fit; combined with zoom or dpi they only cap the size.
+    max_width: Optional[int] = None
+    max_height: Optional[int] = None
+    max_pixels: Optional[int] = None
+    # rgb (default), gray, or bilevel: 1-bit black and white split at threshold
+    colorspace: Literal["rgb", "gray", "bilevel"] = "rgb"
+    threshold: int = 128
+    # Image encoding: quality applies to jpeg/webp, png_compress_level (0-9) to png
+    format: Literal["png", "jpeg", "webp"] = "png"
+    quality: int = 85
+    png_compress_level: Optional[int] = None
+    # json (default), zip, multipart or ndjson; falls back to the Accept header
+    response_format: Optional[Literal["json", "zip", "multipart", "ndjson"]] = None
+    # 1-based pages, e.g. [1, 2] or "1-3,7,-2"; negatives count from the end
+    pages: Optional[Union[str, List[int]]] = None
+    # Add per-stage seconds for this request to JSON responses
+    include_timings: bool = False
+    # "auto" returns the text layer for native pages and renders only the
+    # pages that lack one (scans); "render" renders every page
+    mode: Literal["render", "auto"] = "render"
+    # Return the embedded image of single-image (scanned) pages as stored in
+    # the PDF, at native resolution, when it already has the requested format
+    # and colorspace and no max_* target is set; other pages are rendered
+    passthrough: bool = False
+    # Render only this rectangle of each page, in points: [x0, y0, x1, y1]
+    # or "x0,y0,x1,y1", origin top left
+    clip: Optional[Union[str, List[float]]] = None
+    # Split each rendered page into tiles of at most tile_size x tile_size
+    # pixels, rendered in parallel and returned as separate images
+    tile_size: Optional[int] = None
+
+class PDFRequest(RenderParams):
     pdf_url: str
-    zoom: int = 2  # Default zoom level
 
-@app.post("/convert-pdf-to-png/")
-async def convert_pdf_to_png(request: PDFRequest):
-    pdf_url = request.pdf_url
-    zoom = request.zoom
+class BatchRequest(BaseModel):
+    # Validated one by one, so a malformed entry only fails itself
+    requests: List[dict]
+
+class PDFMetadataRequest(BaseModel):
+    pdf_url: str
+
+class TextRequest(BaseModel):
+    pdf_url: str
+    # Same selection syntax as PDFRequest.pages
+    pages: Optional[Union[str, List[int]]] = None
+    words: bool = True  # Include words with bounding boxes
+    blocks: bool = True  # Include text blocks with bounding boxes
+
+def parse_clip(clip) -> Optional[tuple]:
+    """Turn a ``clip`` setting into an (x0, y0, x1, y1) tuple of points."""
+    if clip is None:
+        return None
+    if isinstance(clip, str):
+        try:
+            clip = [float(value) for value in clip.split(",")]
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid clip '{clip}'.")
+    if len(clip) != 4 or not (clip[0] < clip[2] and clip[1] < clip[3]):
+        raise HTTPException(status_code=400, detail="clip must be x0,y0,x1,y1 with x0 < x1 and y0 < y1.")
+    return tuple(float(value) for value in clip)
 
+# Largest render scale, from zoom, dpi (720 dpi) or a max_* target alike
+MAX_ZOOM = 10
+
+def validate_request(request: RenderParams):
     # Validate zoom level
-    if zoom < 1 or zoom > 10:
-        raise HTTPException(status_code=400, detail="Zoom level must be between 1 and 10.")
-
-    # Download PDF if URL is provided
-    response = requests.get(pdf_url)
-    if response.status_code != 200:
-        raise HTTPException(status_code=400, detail="Failed to download the PDF. Please check the URL.")
-
-    pdf_data = io.BytesIO(response.content)
-
-    try:
-        # Open the PDF document
-        doc = fitz.open(stream=pdf_data, filetype="pdf")
-        mat = fitz.Matrix(zoom, zoom)
-        base64_images = []
-
-        # Loop through all pages
-        for page_num, page in enumerate(doc):
-            pix = page.get_pixmap(matrix=mat)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            
-            # Convert to base64
-            img_buffer = io.BytesIO()
-            img.save(img_buffer, format='PNG')
-            img_buffer.seek(0)
-            base64_string = base64.b64encode(img_buffer.getvalue()).decode()
-            
-            # Create data URL
-            data_url = f"data:image/png;base64,{base64_string}"
-            base64_images.append({
-                "page_number": page_num + 1,
-                "data_url": data_url
+    if request.zoom is not None and not 0 < request.zoom <= MAX_ZOOM:
+        raise HTTPException(status_code=400, detail=f"Zoom level must be greater than 0 and at most {MAX_ZOOM}.")
+    if request.dpi is not None and not 0 < request.dpi <= MAX_ZOOM * 72:
+        raise HTTPException(status_code=400, detail=f"DPI must be greater than 0 and at most {MAX_ZOOM * 72}.")
+    for field in ("max_width", "max_height", "max_pixels"):
+        value = getattr(request, field)
+        if value is not None and value < 1:
+            raise HTTPException(status_code=400, detail=f"{field} must be a positive integer.")
+    if not 0 <= request.threshold <= 255:
+        raise HTTPException(status_code=400, detail="Threshold must be between 0 and 255.")
+    if not 1 <= request.quality <= 100:
+        raise HTTPException(status_code=400, detail="Quality must be between 1 and 100.")
+    if request.png_compress_level is not None and not 0 <= request.png_compress_level <= 9:
+        raise HTTPException(status_code=400, detail="png_compress_level must be between 0 and 9.")
+    parse_clip(request.clip)
+    if request.tile_size is not None and request.tile_size < MIN_TILE_SIZE:
+        raise HTTPException(status_code=400, detail=f"tile_size must be at least {MIN_TILE_SIZE} pixels.")
+
+class SpooledPDF:
+    """Collects a PDF in memory, moving it to a temp file past ``threshold``.
+
+    Writing more than ``max_size`` bytes raises a 413. The SHA-256 digest is
+    computed while writing. Call ``close`` when done; a spooled file is also
+    removed once the object is garbage collected.
+    """
+
+    def __init__(self, threshold: int = SPOOL_THRESHOLD, max_size: Optional[int] = MAX_PDF_BYTES):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.size = 0
+        self.path = None
+        self._chunks = []
+        self._data = None
+        self._file = None
+        self._sha256 = hashlib.sha256()
+        self._digest = None
+
+    @classmethod
+    def from_bytes(cls, data: bytes, digest: Optional[str] = None) -> "SpooledPDF":
+        """Wrap PDF bytes that are already in memory, e.g. from the download cache."""
+        spool = cls(max_size=None)
+        spool.size = len(data)
+        spool._data = data
+        spool._sha256 = None
+        spool._digest = digest
+        return spool
+
+    def write(self, chunk: bytes):
+        BYTES_IN.inc(len(chunk))
+        self.size += len(chunk)
+        if self.max_size is not None and self.size > self.max_size:
+            raise HTTPException(status_code=413, detail=f"PDF is larger than the {self.max_size} byte limit.")
+        self._sha256.update(chunk)
+        if self._file is None and self.size > self.threshold:
+            fd, self.path = tempfile.mkstemp(suffix=".pdf")
+            weakref.finalize(self, _remove_file, self.path)
+            self._file = os.fdopen(fd, "wb")
+            self._file.writelines(self._chunks)
+            self._chunks = []
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._chunks.append(chunk)
+
+    def finish(self):
+        """Return ``(source, digest)``: the PDF bytes or spool file path, and its SHA-256.
+
+        The digest is None for ``from_bytes`` spools created without one.
+        """
+        if self._digest is None and self._sha256 is not None:
+            self._digest = self._sha256.hexdigest()
+        if self.path is not None:
+            if self._file is not None:
+                self._file.close()
+            return self.path, self._digest
+        if self._data is None:
+            self._data = b"".join(self._chunks)
+            self._chunks = []
+        return self._data, self._digest
+
+    def spill(self) -> str:
+        """Write in-memory PDF bytes to a temp file and return its path."""
+        if self.path is None:
+            data, _ = self.finish()
+            fd, self.path = tempfile.mkstemp(suffix=".pdf")
+            weakref.finalize(self, _remove_file, self.path)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            self._data = None
+        return self.path
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self.path is not None:
+            _remove_file(self.path)
+
+@dataclass
+class CachedDownload:
+    data: bytes
+    digest: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_length: Optional[int]
+
+class DownloadCache:
+    """Downloaded PDFs keyed by URL, kept with their HTTP validators.
+
+    Entries are revalidated with a conditional GET, so an unchanged file
+    costs a 304 instead of a full transfer. Total size is bounded by
+    ``max_bytes`` with least-recently-used eviction.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.revalidated = 0
+        self.downloads = 0
+        self._entries = collections.OrderedDict()
+        self._size = 0
+
+    def get(self, url: str) -> Optional[CachedDownload]:
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def discard(self, url: str):
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self._size -= len(entry.data)
+
+    def put(self, url: str, entry: CachedDownload):
+        self.discard(url)
+        if len(entry.data) > self.max_bytes:
+            return
+        self._entries[url] = entry
+        self._size += len(entry.data)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.data)
+
+    def stats(self) -> dict:
+        requests_seen = self.revalidated + self.downloads
+        return {
+            "revalidated": self.revalidated,
+            "downloads": self.downloads,
+            "hit_ratio": self.revalidated / requests_seen if requests_seen else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
+
+download_cache = DownloadCache(DOWNLOAD_CACHE_BYTES)
+Gauge("pdf_download_cache_hit_ratio", "Share of downloads answered with a 304").set_function(
+    lambda: download_cache.stats()["hit_ratio"])
+
+def _resolve_page(page: int, page_count: int) -> int:
+    index = page - 1 if page > 0 else page_count + page
+    if page == 0 or not 0 <= index < page_count:
+        raise HTTPException(status_code=400, detail=f"Page {page} is out of range; the PDF has {page_count} pages.")
+    return index
+
+def parse_page_selection(pages, page_count: int) -> Optional[list]:
+    """Turn a ``pages`` selection into 0-based page indexes.
+
+    Accepts a list of page numbers or a comma-separated string of pages and
+    ranges: ``"7"``, ``"1-3"``, ``"5-"`` (to the end), ``"-2"`` (second to
+    last) and ``"-3--1"`` (last three). Order is kept and duplicates dropped.
+    Returns None, meaning every page, when no selection is given.
+    """
+    if pages is None:
+        return None
+    if isinstance(pages, str):
+        pages = pages.replace(" ", "")
+        if not pages:
+            return None
+        tokens = pages.split(",")
+    else:
+        tokens = pages
+
+    indexes = []
+    for token in tokens:
+        if isinstance(token, int) or re.fullmatch(r"-?\d+", token):
+            indexes.append(_resolve_page(int(token), page_count))
+            continue
+        match = re.fullmatch(r"(-?\d+)-(-?\d+)?", token)
+        if not match:
+            raise HTTPException(status_code=400, detail=f"Invalid page selection '{token}'.")
+        start = _resolve_page(int(match.group(1)), page_count)
+        stop = _resolve_page(int(match.group(2)), page_count) if match.group(2) else page_count - 1
+        if stop < start:
+            raise HTTPException(status_code=400, detail=f"Page range '{token}' is reversed.")
+        indexes.extend(range(start, stop + 1))
+    return list(dict.fromkeys(indexes))
+
+async def download_pdf(pdf_url: str) -> SpooledPDF:
+    """Stream ``pdf_url`` into a SpooledPDF, revalidating cached copies.
+
+    Bodies over ``MAX_PDF_BYTES`` are refused with a 413, up front when the
+    Content-Length says so and otherwise as soon as the limit is crossed.
+    """
+    cached = download_cache.get(pdf_url)
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+    with stage_timer("download"):
+        try:
+            async with get_http_client().stream("GET", pdf_url, headers=headers) as response:
+                if response.status_code == 304 and cached is not None:
+                    download_cache.revalidated += 1
+                    return SpooledPDF.from_bytes(cached.data, cached.digest)
+                if response.status_code != 200:
+                    download_cache.discard(pdf_url)
+                    raise HTTPException(status_code=400, detail="Failed to download the PDF. Please check the URL.")
+
+                content_length = response.headers.get("Content-Length")
+                content_length = int(content_length) if content_length and content_length.isdigit() else None
+                if content_length is not None and content_length > MAX_PDF_BYTES:
+                    raise HTTPException(status_code=413, detail=f"PDF is larger than the {MAX_PDF_BYTES} byte limit.")
+
+                spool = SpooledPDF(SPOOL_THRESHOLD, MAX_PDF_BYTES)
+                try:
+                    async for chunk in response.aiter_bytes():
+                        spool.write(chunk)
+                except BaseException:
+                    spool.close()
+                    raise
+        except httpx.TimeoutException:
+            raise HTTPException(status_code=504, detail="Timed out downloading the PDF.")
+        except httpx.HTTPError:
+            raise HTTPException(status_code=400, detail="Failed to download the PDF. Please check the URL.")
+
+    download_cache.downloads += 1
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    # Only keep in-memory responses we can revalidate, and never a truncated body
+    if (spool.path is None and (etag or last_modified)
+            and content_length in (None, response.num_bytes_downloaded)):
+        pdf_bytes, digest = spool.finish()
+        download_cache.put(pdf_url, CachedDownload(pdf_bytes, digest, etag, last_modified, content_length))
+    else:
+        download_cache.discard(pdf_url)
+    return spool
+
+class RenderCache:
+    """Encoded page images keyed by (PDF SHA-256, page index, RenderOptions).
+
+    Entries live in an in-memory LRU bounded by ``max_bytes``. When
+    ``disk_dir`` is set, every entry is also written there and the directory
+    is trimmed oldest-first once it grows past ``disk_max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._disk_lock = threading.Lock()
+        self._disk_size = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_size = sum(entry.stat().st_size for entry in os.scandir(disk_dir) if entry.is_file())
+
+    def _disk_path(self, key) -> str:
+        name = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.disk_dir, name + ".bin")
+
+    async def contains_many(self, keys: list) -> List[bool]:
+        """Which of ``keys`` are cached, with one off-loop pass over the disk tier."""
+        found = [key in self._entries for key in keys]
+        missing = [index for index, hit in enumerate(found) if not hit]
+        if self.disk_dir and missing:
+            on_disk = await asyncio.to_thread(
+                lambda: [os.path.exists(self._disk_path(keys[index])) for index in missing])
+            for index, hit in zip(missing, on_disk):
+                found[index] = hit
+        return found
+
+    def _remember(self, key, image: bytes):
+        if len(image) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key))
+        self._entries[key] = image
+        self._size += len(image)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def _read_disk(self, key) -> Optional[bytes]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                image = f.read()
+            os.utime(path)  # Mark as recently used for eviction
+            return image
+        except OSError:
+            return None
+
+    def _write_disk(self, key, image: bytes):
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(image)
+        os.replace(tmp_path, path)
+        with self._disk_lock:
+            self._disk_size += len(image)
+            if self._disk_size > self.disk_max_bytes:
+                self._trim_disk()
+
+    def _trim_disk(self):
+        entries = sorted((entry for entry in os.scandir(self.disk_dir) if entry.name.endswith(".bin")),
+                         key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self._disk_size <= self.disk_max_bytes * 0.9:
+                break
+            try:
+                size = entry.stat().st_size
+                os.unlink(entry.path)
+                self._disk_size -= size
+            except OSError:
+                pass
+
+    async def get(self, key) -> Optional[bytes]:
+        image = self._entries.get(key)
+        if image is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+        if self.disk_dir:
+            image = await asyncio.to_thread(self._read_disk, key)
+            if image is not None:
+                self.disk_hits += 1
+                self._remember(key, image)
+                return image
+        return None
+
+    async def put(self, key, image: bytes):
+        self._remember(key, image)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, image)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "disk_bytes": self._disk_size,
+        }
+
+render_cache = RenderCache(RENDER_CACHE_BYTES, RENDER_CACHE_DIR, RENDER_CACHE_DISK_BYTES)
+Gauge("pdf_render_cache_hit_ratio", "Render cache hit ratio").set_function(
+    lambda: render_cache.stats()["hit_ratio"])
+
+@dataclass(frozen=True)
+class RenderOptions:
+    """Everything that changes a rendered page image; part of the cache key."""
+    zoom: Optional[float] = 2
+    dpi: Optional[float] = None
+    max_width: Optional[int] = None
+    max_height: Optional[int] = None
+    max_pixels: Optional[int] = None
+    colorspace: str = "rgb"
+    threshold: int = 128
+    format: str = "png"
+    quality: Optional[int] = None
+    png_compress_level: Optional[int] = None
+    passthrough: bool = False
+    clip: Optional[tuple] = None
+    tile_size: Optional[int] = None
+
+def render_options(request: RenderParams) -> RenderOptions:
+    zoom = request.zoom
+    if zoom is None and request.dpi is None and not (request.max_width or request.max_height or request.max_pixels):
+        zoom = 2.0
+    return RenderOptions(
+        zoom=zoom,
+        dpi=request.dpi,
+        max_width=request.max_width,
+        max_height=request.max_height,
+        max_pixels=request.max_pixels,
+        colorspace=request.colorspace,
+        # The threshold only matters for bilevel, keep it out of other cache keys
+        threshold=request.threshold if request.colorspace == "bilevel" else 128,
+        format=request.format,
+        # Likewise, only keep the encoder setting that applies to the format
+        quality=request.quality if request.format != "png" else None,
+        png_compress_level=request.png_compress_level if request.format == "png" else None,
+        passthrough=request.passthrough,
+        clip=parse_clip(request.clip),
+        tile_size=request.tile_size
+    )
+
+@dataclass
+class LoadedPDF:
+    source: Union[bytes, str]  # PDF bytes, or the path of a spooled file
+    digest: str
+    page_count: int
+    spool: Optional[SpooledPDF] = None  # Keeps a spooled file alive while in use
+
+def _open_pdf(source):
+    # ``source`` is either the PDF bytes, handed to MuPDF without a BytesIO
+    # copy, or a file path that MuPDF reads on demand
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+def count_pages(source) -> int:
+    with _open_pdf(source) as doc:
+        return doc.page_count
+
+def extract_page_text(page, words: bool = True, blocks: bool = True) -> dict:
+    """Text of one page, optionally with word and block boxes in PDF points."""
+    # One TextPage serves all three extractions instead of re-parsing the page
+    textpage = page.get_textpage()
+    result = {
+        "page_number": page.number + 1,
+        "width": page.rect.width,
+        "height": page.rect.height,
+        "text": page.get_text("text", textpage=textpage)
+    }
+    if words:
+        result["words"] = [
+            {"text": text, "bbox": [x0, y0, x1, y1], "block": block, "line": line, "word": word}
+            for x0, y0, x1, y1, text, block, line, word in page.get_text("words", textpage=textpage)
+        ]
+    if blocks:
+        result["blocks"] = [
+            {"text": text, "bbox": [x0, y0, x1, y1], "block": block, "type": "image" if kind else "text"}
+            for x0, y0, x1, y1, text, block, kind in page.get_text("blocks", textpage=textpage)
+        ]
+    return result
+
+def classify_page(page) -> dict:
+    """Decide whether a page has a usable text layer or needs rendering.
+
+    Compares the share of the page covered by text blocks with the share
+    covered by images. A page needs rendering when it has almost no text,
+    or when images cover most of it and text very little (a scan with at
+    most a stamp or header in real text).
+    """
+    textpage = page.get_textpage()
+    text = page.get_text("text", textpage=textpage)
+    area = abs(page.rect) or 1.0
+    text_area = sum(abs(fitz.Rect(block[:4]) & page.rect)
+                    for block in page.get_text("blocks", textpage=textpage) if block[6] == 0)
+    image_area = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+    text_coverage = min(1.0, text_area / area)
+    image_coverage = min(1.0, image_area / area)
+    needs_render = (len(text.strip()) < AUTO_MIN_TEXT_CHARS
+                    or (image_coverage >= AUTO_IMAGE_COVERAGE and text_coverage < AUTO_MIN_TEXT_COVERAGE))
+    return {
+        "page_number": page.number + 1,
+        "needs_render": needs_render,
+        "text": None if needs_render else text,
+        "text_coverage": round(text_coverage, 4),
+        "image_coverage": round(image_coverage, 4)
+    }
+
+def classify_page_batch(source, page_nums: list) -> list:
+    """Classify the given 0-based pages inside a render worker."""
+    with _open_pdf(source) as doc:
+        return [classify_page(doc[page_num]) for page_num in page_nums]
+
+def extract_text_batch(source, page_nums: list, words: bool, blocks: bool) -> list:
+    """Extract the given 0-based pages inside a render worker."""
+    with _open_pdf(source) as doc:
+        return [extract_page_text(doc[page_num], words, blocks) for page_num in page_nums]
+
+def single_image_xref(page) -> Optional[int]:
+    """The xref of the image a page consists of, or None.
+
+    Matches plain scans: one unmasked, upright image covering the page, with
+    no drawings, annotations or visible text on top. Invisible OCR text is
+    allowed, it does not show in a render either.
+    """
+    images = page.get_images(full=True)
+    if len(images) != 1 or images[0][1] or page.rotation or page.first_annot is not None:
+        return None
+    infos = page.get_image_info(xrefs=True)
+    if len(infos) != 1:
+        return None
+    transform = fitz.Matrix(infos[0]["transform"])
+    if transform.b or transform.c or transform.a <= 0 or transform.d <= 0:
+        return None
+    coverage = abs(fitz.Rect(infos[0]["bbox"]) & page.rect) / (abs(page.rect) or 1.0)
+    if coverage < PASSTHROUGH_MIN_COVERAGE:
+        return None
+    if page.get_drawings() or any(span["type"] != 3 for span in page.get_texttrace()):
+        return None
+    return images[0][0]
+
+def embedded_page_image(page, options: RenderOptions) -> Optional[dict]:
+    """The stored image of a single-image page, if it is already what ``options`` ask for.
+
+    JPEGs come back byte for byte; other lossless encodings (CCITT, Flate)
+    come back as PNG from MuPDF. The image must match the requested format
+    and colorspace (bilevel meaning 1 bit gray); CMYK, JPX and JBIG2 images
+    never match.
+    """
+    xref = single_image_xref(page)
+    if xref is None:
+        return None
+    extracted = page.parent.extract_image(xref)
+    colorspace = {1: "bilevel" if extracted["bpc"] == 1 else "gray", 3: "rgb"}.get(extracted["colorspace"])
+    if extracted["ext"] != options.format or colorspace != options.colorspace:
+        return None
+    return {"mime_type": IMAGE_MIME_TYPES[extracted["ext"]], "image": extracted["image"]}
+
+def describe_pdf(source) -> dict:
+    """Collect document and per-page facts without rasterizing anything."""
+    with _open_pdf(source) as doc:
+        pages = []
+        for page in doc:
+            pages.append({
+                "page_number": page.number + 1,
+                "width": page.rect.width,
+                "height": page.rect.height,
+                "rotation": page.rotation,
+                "has_text": bool(page.get_text("text").strip()),
+                "image_count": len(page.get_images()),
+                "single_image": single_image_xref(page) is not None
+            })
+        return {
+            "page_count": doc.page_count,
+            "metadata": doc.metadata,
+            "pages": pages
+        }
+
+def _pixmap_to_pil(pix, options: RenderOptions):
+    if options.colorspace == "rgb":
+        return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    img = Image.frombytes("L", [pix.width, pix.height], pix.samples)
+    if options.colorspace == "bilevel":
+        # MuPDF has no 1-bit pixmaps, so threshold the gray render here
+        lut = [255 if value >= options.threshold else 0 for value in range(256)]
+        img = img.point(lut, mode="1")
+    return img
+
+def encode_pixmap(pix, options: RenderOptions, timings: Optional[dict] = None) -> bytes:
+    """Encode ``pix`` per ``options``, adding convert/encode seconds to ``timings``."""
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    # MuPDF encodes PNG and JPEG straight from the pixmap samples, so PIL is
+    # only involved for bilevel output, WebP and custom PNG compression
+    if options.format == "png" and options.colorspace != "bilevel" and options.png_compress_level is None:
+        image = pix.tobytes("png")
+        timings["encode"] = timings.get("encode", 0.0) + time.perf_counter() - started
+        return image
+    if options.format == "jpeg" and options.colorspace != "bilevel":
+        image = pix.tobytes("jpeg", jpg_quality=options.quality)
+        timings["encode"] = timings.get("encode", 0.0) + time.perf_counter() - started
+        return image
+
+    img = _pixmap_to_pil(pix, options)
+    converted = time.perf_counter()
+    timings["convert"] = timings.get("convert", 0.0) + converted - started
+    img_buffer = io.BytesIO()
+    if options.format == "png":
+        compress_level = 6 if options.png_compress_level is None else options.png_compress_level
+        img.save(img_buffer, format='PNG', compress_level=compress_level)
+    elif options.format == "jpeg":
+        img.convert("L").save(img_buffer, format='JPEG', quality=options.quality)
+    else:
+        img.save(img_buffer, format='WEBP', quality=options.quality)
+    timings["encode"] = timings.get("encode", 0.0) + time.perf_counter() - converted
+    return img_buffer.getvalue()
+
+def page_region(page, options: RenderOptions):
+    """The part of the page to render: the clip rectangle, or the whole page."""
+    if options.clip is None:
+        return page.rect
+    region = fitz.Rect(options.clip) & page.rect
+    if region.is_empty:
+        raise ValueError(f"clip lies outside page {page.number + 1}.")
+    return region
+
+def page_matrix(page, options: RenderOptions):
+    """Scale for one page: dpi or zoom, shrunk to fit any max_* target."""
+    scale = options.dpi / 72 if options.dpi else options.zoom
+    region = page_region(page, options)
+    width, height = region.width, region.height
+    limits = []
+    if options.max_width:
+        limits.append(options.max_width / width)
+    if options.max_height:
+        limits.append(options.max_height / height)
+    if options.max_pixels:
+        limits.append(math.sqrt(options.max_pixels / (width * height)))
+    if limits:
+        scale = min(limits) if scale is None else min([scale] + limits)
+    # max_* targets alone would scale small pages (or clips) up without limit
+    scale = min(scale, MAX_ZOOM)
+    return fitz.Matrix(scale, scale)
+
+def tile_grid(page, options: RenderOptions) -> list:
+    """Split the rendered page into tiles of at most ``options.tile_size`` pixels.
+
+    Returns ``(tile, clip)`` pairs row by row, where ``tile`` describes the
+    tile's place in the full render and ``clip`` is its area in points.
+    """
+    region = page_region(page, options)
+    scale = page_matrix(page, options).a
+    width, height = math.ceil(region.width * scale), math.ceil(region.height * scale)
+    size = options.tile_size
+    rows, cols = -(-height // size), -(-width // size)
+    grid = []
+    for row in range(rows):
+        for col in range(cols):
+            x, y = col * size, row * size
+            tile = {
+                "row": row, "col": col, "rows": rows, "cols": cols,
+                "x": x, "y": y, "width": min(size, width - x), "height": min(size, height - y)
+            }
+            clip = fitz.Rect(region.x0 + x / scale, region.y0 + y / scale,
+                             region.x0 + (x + tile["width"]) / scale, region.y0 + (y + tile["height"]) / scale)
+            grid.append((tile, clip))
+    return grid
+
+def plan_tiles(source, options: RenderOptions, page_nums: list) -> list:
+    """List ``(page_num, tile)`` for every tile of the given 0-based pages."""
+    with _open_pdf(source) as doc:
+        return [(page_num, tile) for page_num in page_nums for tile, _ in tile_grid(doc[page_num], options)]
+
+def first_page_outside_clip(source, clip: tuple, page_nums: Optional[list]) -> Optional[int]:
+    """The 1-based number of the first selected page ``clip`` misses, or None."""
+    with _open_pdf(source) as doc:
+        for page_num in range(doc.page_count) if page_nums is None else page_nums:
+            if (fitz.Rect(clip) & doc[page_num].rect).is_empty:
+                return page_num + 1
+    return None
+
+def render_page_batch(source, options: RenderOptions, page_nums: list) -> list:
+    """Render the given 0-based pages inside a render worker.
+
+    With ``options.tile_size`` set, ``page_nums`` holds ``(page_num, row,
+    col)`` tuples and each record is one tile, carrying its place in
+    ``tile``. Each record carries the seconds spent per stage in
+    ``timings``; the time to open the document is charged to the first
+    record of the batch.
+    """
+    records = []
+    started = time.perf_counter()
+    with _open_pdf(source) as doc:
+        opened = time.perf_counter() - started
+        for unit in page_nums:
+            page_num = unit[0] if options.tile_size else unit
+            timings = {"open": opened} if not records else {}
+            started = time.perf_counter()
+            page = doc[page_num]
+            record = {"page_number": page_num + 1}
+            # A passed-through image is always the whole page at its native size
+            embedded = None
+            if (options.passthrough and options.clip is None and not options.tile_size
+                    and not (options.max_width or options.max_height or options.max_pixels)):
+                embedded = embedded_page_image(page, options)
+            if embedded is not None:
+                timings["extract"] = time.perf_counter() - started
+                records.append({**record, **embedded, "timings": timings})
+                continue
+            clip = None if options.clip is None else page_region(page, options)
+            if options.tile_size:
+                _, row, col = unit
+                grid = tile_grid(page, options)
+                record["tile"], clip = grid[row * grid[0][0]["cols"] + col]
+            colorspace = fitz.csRGB if options.colorspace == "rgb" else fitz.csGRAY
+            pix = page.get_pixmap(matrix=page_matrix(page, options), colorspace=colorspace, clip=clip)
+            timings["render"] = time.perf_counter() - started
+            records.append({
+                **record,
+                "mime_type": IMAGE_MIME_TYPES[options.format],
+                "image": encode_pixmap(pix, options, timings),
+                "timings": timings
             })
+            # Drop the pixmap before the next tile so peak memory stays at one tile
+            del pix
+    return records
+
+def get_render_executor():
+    """Return the shared render pool of ``RENDER_POOL_SIZE`` workers, creating it on first use."""
+    global _render_executor
+    if _render_executor is None:
+        if RENDER_EXECUTOR == "thread":
+            _render_executor = ThreadPoolExecutor(max_workers=RENDER_POOL_SIZE)
+        else:
+            _render_executor = ProcessPoolExecutor(max_workers=RENDER_POOL_SIZE)
+    return _render_executor
+
+async def run_in_render_pool(fn, *args):
+    """Run ``fn`` on the render pool, waiting for a free queue slot first.
+
+    At most ``RENDER_QUEUE_DEPTH`` tasks are running or queued at once; callers
+    that cannot get a slot within ``RENDER_QUEUE_TIMEOUT`` get a 503.
+    """
+    global _render_executor
+    try:
+        await asyncio.wait_for(_render_slots.acquire(), RENDER_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Render queue is full. Please retry later.",
+                            headers={"Retry-After": str(int(RENDER_QUEUE_TIMEOUT))})
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_render_executor(), fn, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM on a huge page); start a fresh pool next time
+        _render_executor = None
+        raise HTTPException(status_code=500, detail="Render worker crashed.")
+    finally:
+        _render_slots.release()
+
+def pdf_digest(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+async def load_pdf(spool: SpooledPDF) -> LoadedPDF:
+    """Check that the spooled PDF opens and count its pages."""
+    source, digest = spool.finish()
+    if digest is None:
+        digest = await asyncio.to_thread(pdf_digest, source)
+    if isinstance(source, bytes) and len(source) > SHARE_BY_PATH_BYTES and RENDER_EXECUTOR != "thread":
+        # Process workers then open the file by path instead of unpickling
+        # a full copy of the bytes for every task
+        source = await asyncio.to_thread(spool.spill)
+    page_count = _page_counts.get(digest)
+    if page_count is None:
+        try:
+            with stage_timer("open"):
+                page_count = await run_in_render_pool(count_pages, source)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        _page_counts[digest] = page_count
+        if len(_page_counts) > PAGE_COUNT_CACHE_SIZE:
+            _page_counts.popitem(last=False)
+    return LoadedPDF(source=source, digest=digest, page_count=page_count, spool=spool)
+
+async def check_clip(pdf: LoadedPDF, params: RenderParams, page_nums: Optional[list]):
+    """Reject with a 400, before rendering starts, a clip that misses a selected page."""
+    clip = parse_clip(params.clip)
+    if clip is None:
+        return
+    page_number = await run_in_render_pool(first_page_outside_clip, pdf.source, clip, page_nums)
+    if page_number is not None:
+        raise HTTPException(status_code=400, detail=f"clip lies outside page {page_number}.")
+
+def _remove_file(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
 
+def completes_page(record: dict) -> bool:
+    """True for a page record, or for the last tile of a tiled page."""
+    tile = record.get("tile")
+    return tile is None or (tile["row"] == tile["rows"] - 1 and tile["col"] == tile["cols"] - 1)
+
+def chunk_pages(page_nums) -> int:
+    """Pages per render task: spread evenly over the workers, at most RENDER_CHUNK_PAGES."""
+    return max(1, min(RENDER_CHUNK_PAGES, -(-len(page_nums) // RENDER_POOL_SIZE)))
+
+async def render_pages(pdf: LoadedPDF, options: RenderOptions, page_nums: Optional[list] = None,
+                       max_buffered: Optional[int] = None):
+    """Yield page records in order while chunks render in parallel.
+
+    ``page_nums`` lists the 0-based pages to render and defaults to all of them.
+
+    Pages already in ``render_cache`` are read back from it; the rest are
+    split into batches rendered concurrently on the render pool, keeping at
+    most ``RENDER_DOC_PARALLELISM`` steps in flight. With ``options.tile_size``
+    the same applies per tile, and every tile is yielded as its own record.
+
+    Streaming callers pass ``max_buffered``: the first batch is then a single
+    page so the first record comes back quickly, and at most that many pages
+    are in flight or waiting to be yielded.
+    """
+    if page_nums is None:
+        page_nums = range(pdf.page_count)
+    source = pdf.source
+
+    # Tiles are cached and rendered as (page_num, row, col) units
+    units, tiles = page_nums, {}
+    if options.tile_size:
+        page_nums = list(page_nums)
+        chunk = chunk_pages(page_nums)
+        with stage_timer("plan"):
+            planned = await asyncio.gather(*[
+                run_in_render_pool(plan_tiles, source, options, page_nums[start:start + chunk])
+                for start in range(0, len(page_nums), chunk)])
+        tiles = {(page_num, tile["row"], tile["col"]): tile for batch in planned for page_num, tile in batch}
+        units = list(tiles)
+    chunk = chunk_pages(units)
+    if max_buffered:
+        chunk = max(1, min(chunk, max_buffered // RENDER_POOL_SIZE))
+
+    # Plan the work: a bare unit is cached, a list is a batch to render
+    plan, batch = [], []
+    cached = await render_cache.contains_many([(pdf.digest, unit, options) for unit in units])
+    for unit, is_cached in zip(units, cached):
+        if is_cached:
+            if batch:
+                plan.append(batch)
+                batch = []
+            plan.append(unit)
+        else:
+            batch.append(unit)
+            if len(batch) == (1 if max_buffered and not plan else chunk):
+                plan.append(batch)
+                batch = []
+    if batch:
+        plan.append(batch)
+
+    def record_unit(record):
+        page_num = record["page_number"] - 1
+        return (page_num, record["tile"]["row"], record["tile"]["col"]) if "tile" in record else page_num
+
+    async def render_batch(units):
+        render_cache.misses += len(units)
+        records = await run_in_render_pool(render_page_batch, source, options, units)
+        PAGES_RENDERED.inc(sum(1 for record in records if completes_page(record)))
+        for record in records:
+            for stage, seconds in record.pop("timings").items():
+                record_stage(stage, seconds)
+            await render_cache.put((pdf.digest, record_unit(record), options), record["image"])
+        return records
+
+    async def read_cached(unit):
+        image = await render_cache.get((pdf.digest, unit, options))
+        if image is None:
+            # Evicted since planning
+            return await render_batch([unit])
+        record = {"page_number": (unit[0] if tiles else unit) + 1,
+                  "mime_type": IMAGE_MIME_TYPES[options.format], "image": image}
+        if tiles:
+            record["tile"] = tiles[unit]
+        return [record]
+
+    def step_size(step):
+        return len(step) if isinstance(step, list) else 1
+
+    pending = collections.deque()
+    buffered = 0
+    try:
+        for step in plan:
+            # Wait for the oldest step while the new one would overfill the window
+            while pending and (len(pending) >= RENDER_DOC_PARALLELISM
+                               or (max_buffered and buffered + step_size(step) > max_buffered)):
+                size, task = pending.popleft()
+                buffered -= size
+                for record in await task:
+                    BYTES_OUT.inc(len(record["image"]))
+                    yield record
+            pending.append((step_size(step), asyncio.ensure_future(
+                render_batch(step) if isinstance(step, list) else read_cached(step))))
+            buffered += step_size(step)
+        while pending:
+            size, task = pending.popleft()
+            buffered -= size
+            for record in await task:
+                BYTES_OUT.inc(len(record["image"]))
+                yield record
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+async def auto_pages(pdf: LoadedPDF, options: RenderOptions, page_nums: Optional[list] = None,
+                     max_buffered: Optional[int] = None):
+    """Yield text records for native pages and rendered records for the rest, in order."""
+    if page_nums is None:
+        page_nums = list(range(pdf.page_count))
+    chunk = chunk_pages(page_nums)
+    batches = [page_nums[start:start + chunk] for start in range(0, len(page_nums), chunk)]
+    with stage_timer("classify"):
+        results = await asyncio.gather(*[run_in_render_pool(classify_page_batch, pdf.source, batch)
+                                         for batch in batches])
+    pages = [page for batch in results for page in batch]
+
+    to_render = [page["page_number"] - 1 for page in pages if page["needs_render"]]
+    rendered = render_pages(pdf, options, to_render, max_buffered) if to_render else None
+
+    async def next_rendered():
+        try:
+            return await rendered.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    try:
+        record = None
+        for page in pages:
+            if page["needs_render"]:
+                # A tiled page yields several records
+                if record is None:
+                    record = await next_rendered()
+                while record is not None and record["page_number"] == page["page_number"]:
+                    yield record
+                    record = await next_rendered()
+            else:
+                yield {
+                    "page_number": page["page_number"],
+                    "mime_type": TEXT_MIME_TYPE,
+                    "text": page["text"],
+                    "text_coverage": page["text_coverage"],
+                    "image_coverage": page["image_coverage"]
+                }
+    finally:
+        if rendered is not None:
+            await rendered.aclose()
+
+def page_records(pdf: LoadedPDF, params: RenderParams, page_nums: Optional[list] = None,
+                 streaming: bool = False):
+    """Page records for ``params.mode``: rendered images, or the auto mix.
+
+    ``streaming`` bounds how far rendering runs ahead of the consumer.
+    """
+    options = render_options(params)
+    max_buffered = STREAM_BUFFER_PAGES if streaming else None
+    if params.mode == "auto":
+        return auto_pages(pdf, options, page_nums, max_buffered)
+    return render_pages(pdf, options, page_nums, max_buffered)
+
+def page_filename(record: dict) -> str:
+    extension = IMAGE_EXTENSIONS[record["mime_type"]]
+    if "tile" in record:
+        return f"page-{record['page_number']}-tile-{record['tile']['row']}-{record['tile']['col']}.{extension}"
+    return f"page-{record['page_number']}.{extension}"
+
+def record_bytes(record: dict) -> bytes:
+    return record["image"] if "image" in record else record["text"].encode()
+
+def new_json_body(params: RenderParams) -> dict:
+    body = {"message": "Conversion successful", "images": []}
+    if params.mode == "auto":
+        body["text_pages"] = []
+    return body
+
+def add_page_to_body(body: dict, record: dict) -> dict:
+    page = page_to_json(record)
+    body["text_pages" if "text" in record else "images"].append(page)
+    return page
+
+def page_json_size(page: dict) -> int:
+    """Bytes of base64 image or text in one ``page_to_json`` entry."""
+    return len(page.get("data_url") or page.get("text") or "")
+
+def page_to_json(record: dict) -> dict:
+    if "text" in record:
         return {
-            "message": "Conversion successful",
-            "images": base64_images
+            "page_number": record["page_number"],
+            "text": record["text"],
+            "text_coverage": record["text_coverage"],
+            "image_coverage": record["image_coverage"]
         }
+    # Convert to base64 data URL
+    with stage_timer("base64"):
+        base64_string = base64.b64encode(record["image"]).decode()
+    image = {
+        "page_number": record["page_number"],
+        "data_url": f"data:{record['mime_type']};base64,{base64_string}"
+    }
+    if "tile" in record:
+        image["tile"] = record["tile"]
+    return image
+
+class _ChunkWriter(io.RawIOBase):
+    """Unseekable sink that lets ``zipfile`` write into a streamed response."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+async def ndjson_body(records):
+    try:
+        async for record in records:
+            yield json.dumps(page_to_json(record)) + "\n"
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        yield json.dumps({"error": str(e)}) + "\n"
+
+async def zip_body(records):
+    sink = _ChunkWriter()
+    # Images are already compressed, so store them as-is
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        async for record in records:
+            archive.writestr(page_filename(record), record_bytes(record))
+            yield sink.drain()
+    yield sink.drain()
+
+async def multipart_body(records, boundary: str):
+    async for record in records:
+        yield (
+            f"--{boundary}\r\n"
+            f"Content-Type: {record['mime_type']}\r\n"
+            f"Content-Disposition: attachment; filename=\"{page_filename(record)}\"\r\n"
+            f"X-Page-Number: {record['page_number']}\r\n\r\n"
+        ).encode() + record_bytes(record) + b"\r\n"
+    yield f"--{boundary}--\r\n".encode()
+
+def pick_response_format(request: RenderParams, accept: Optional[str]) -> str:
+    if request.response_format:
+        return request.response_format
+    for response_format, media_type in RESPONSE_MEDIA_TYPES.items():
+        if accept and media_type in accept:
+            return response_format
+    return "json"
+
+def stream_records(records, response_format: str) -> StreamingResponse:
+    if response_format == "zip":
+        return StreamingResponse(zip_body(records), media_type="application/zip",
+                                 headers={"Content-Disposition": 'attachment; filename="pages.zip"'})
+    if response_format == "multipart":
+        boundary = uuid.uuid4().hex
+        return StreamingResponse(multipart_body(records, boundary),
+                                 media_type=f"multipart/mixed; boundary={boundary}")
+    return StreamingResponse(ndjson_body(records), media_type="application/x-ndjson")
+
+async def respond_with_pages(pdf: LoadedPDF, params: RenderParams, accept: Optional[str]):
+    response_format = pick_response_format(params, accept)
+    page_nums = parse_page_selection(params.pages, pdf.page_count)
+    await check_clip(pdf, params, page_nums)
+
+    if response_format != "json":
+        return stream_records(page_records(pdf, params, page_nums, streaming=True), response_format)
+
+    try:
+        body = new_json_body(params)
+        async for record in page_records(pdf, params, page_nums):
+            add_page_to_body(body, record)
+
+        timings = _stage_timings.get()
+        if params.include_timings and timings is not None:
+            body["timings"] = timings
+        return body
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def params_from_query(http_request: Request) -> RenderParams:
+    """Read RenderParams from the query string of an upload request."""
+    try:
+        params = RenderParams.model_validate(dict(http_request.query_params))
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    validate_request(params)
+    return params
+
+async def respond_with_spooled_pages(spool: SpooledPDF, params: RenderParams, accept: Optional[str]):
+    """Convert a spooled PDF, deleting its spool file once the response is sent."""
+    try:
+        pdf = await load_pdf(spool)
+        response = await respond_with_pages(pdf, params, accept)
+    except BaseException:
+        spool.close()
+        raise
+    if isinstance(response, StreamingResponse):
+        response.background = BackgroundTask(spool.close)
+    else:
+        spool.close()
+    return response
+
+@app.post("/convert-pdf-to-png/")
+async def convert_pdf_to_png(request: PDFRequest, accept: Optional[str] = Header(None)):
+    validate_request(request)
+    return await respond_with_spooled_pages(await download_pdf(request.pdf_url), request, accept)
+
+@app.post("/convert-pdf-to-png/upload")
+async def convert_uploaded_pdf_to_png(http_request: Request, file: UploadFile = File(...),
+                                      accept: Optional[str] = Header(None)):
+    """Convert a multipart PDF upload; render settings go in the query string."""
+    params = params_from_query(http_request)
+    if file.size is not None and file.size > MAX_PDF_BYTES:
+        raise HTTPException(status_code=413, detail=f"PDF is larger than the {MAX_PDF_BYTES} byte limit.")
+    spool = SpooledPDF()
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    finally:
+        await file.close()
+    return await respond_with_spooled_pages(spool, params, accept)
+
+@app.post("/convert-pdf-to-png/raw")
+async def convert_raw_pdf_to_png(http_request: Request, accept: Optional[str] = Header(None)):
+    """Convert an ``application/pdf`` request body; render settings go in the query string."""
+    params = params_from_query(http_request)
+    content_type = http_request.headers.get("Content-Type", "")
+    if content_type.split(";")[0].strip().lower() != "application/pdf":
+        raise HTTPException(status_code=415, detail="Request body must be sent as Content-Type: application/pdf.")
+    content_length = http_request.headers.get("Content-Length", "")
+    if content_length.isdigit() and int(content_length) > MAX_PDF_BYTES:
+        raise HTTPException(status_code=413, detail=f"PDF is larger than the {MAX_PDF_BYTES} byte limit.")
+    spool = SpooledPDF()
+    try:
+        async for chunk in http_request.stream():
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    return await respond_with_spooled_pages(spool, params, accept)
+
+async def convert_batch_item(index: int, item: dict) -> dict:
+    """Convert one batch entry, reporting failure in the result instead of raising."""
+    try:
+        request = PDFRequest.model_validate(item)
+    except ValidationError as e:
+        return {"index": index, "status_code": 422,
+                "error": e.errors(include_url=False, include_context=False)}
+    try:
+        validate_request(request)
+        spool = await download_pdf(request.pdf_url)
+        try:
+            pdf = await load_pdf(spool)
+            page_nums = parse_page_selection(request.pages, pdf.page_count)
+            await check_clip(pdf, request, page_nums)
+            body = {"index": index, **new_json_body(request)}
+            async for record in page_records(pdf, request, page_nums):
+                add_page_to_body(body, record)
+            return body
+        finally:
+            spool.close()
+    except HTTPException as e:
+        return {"index": index, "status_code": e.status_code, "error": e.detail}
+    except Exception as e:
+        return {"index": index, "status_code": 500, "error": str(e)}
 
+@app.post("/convert-pdf-to-png/batch")
+async def convert_pdf_batch(batch: BatchRequest):
+    """Convert many PDFs, streaming one NDJSON line per input as each finishes.
+
+    Lines arrive in completion order and carry the input ``index``. A failed
+    entry yields ``status_code`` and ``error`` without affecting the others.
+    """
+    if len(batch.requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {BATCH_MAX_ITEMS} requests.")
+
+    async def batch_lines():
+        slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def run(index, item):
+            async with slots:
+                return await convert_batch_item(index, item)
+
+        tasks = [asyncio.ensure_future(run(index, item)) for index, item in enumerate(batch.requests)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(batch_lines(), media_type="application/x-ndjson")
+
+class InMemoryJobStore:
+    """Job records and results kept in this process for ``ttl`` seconds after their last update.
+
+    Results are bounded by ``max_bytes`` of base64 images and text in
+    total; the oldest are dropped first, and fetching a dropped result gives
+    a 404 like an expired one. A single result over ``max_bytes`` is
+    refused with a 413.
+    """
+
+    def __init__(self, ttl: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._records = {}
+        self._results = collections.OrderedDict()
+        self._results_size = 0
+
+    def _discard_result(self, job_id: str):
+        entry = self._results.pop(job_id, None)
+        if entry is not None:
+            self._results_size -= entry[1]
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for job_id in [job_id for job_id, (expires, _) in self._records.items() if expires < now]:
+            del self._records[job_id]
+            self._discard_result(job_id)
+
+    async def put(self, job_id: str, record: dict):
+        self._evict_expired()
+        self._records[job_id] = (time.monotonic() + self.ttl, dict(record))
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        self._evict_expired()
+        entry = self._records.get(job_id)
+        return dict(entry[1]) if entry else None
+
+    async def put_result(self, job_id: str, result: dict):
+        self._discard_result(job_id)
+        size = sum(page_json_size(page) for page in result["images"] + result.get("text_pages", []))
+        if size > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"Job result is larger than the {self.max_bytes} byte limit.")
+        self._results[job_id] = (result, size)
+        self._results_size += size
+        while self._results_size > self.max_bytes:
+            _, (_, evicted_size) = self._results.popitem(last=False)
+            self._results_size -= evicted_size
+
+    async def get_result(self, job_id: str) -> Optional[dict]:
+        self._evict_expired()
+        entry = self._results.get(job_id)
+        return entry[0] if entry else None
+
+class RedisJobStore:
+    """Same interface as InMemoryJobStore, backed by Redis keys that expire after ``ttl``."""
+
+    def __init__(self, url: str, ttl: int):
+        import redis.asyncio as redis  # Optional dependency, only needed for JOB_STORE_URL
+        self.ttl = ttl
+        self._redis = redis.from_url(url)
+
+    async def put(self, job_id: str, record: dict):
+        await self._redis.set(f"pdfjob:{job_id}", json.dumps(record), ex=self.ttl)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        raw = await self._redis.get(f"pdfjob:{job_id}")
+        return json.loads(raw) if raw else None
+
+    async def put_result(self, job_id: str, result: dict):
+        await self._redis.set(f"pdfjob:{job_id}:result", json.dumps(result), ex=self.ttl)
+
+    async def get_result(self, job_id: str) -> Optional[dict]:
+        raw = await self._redis.get(f"pdfjob:{job_id}:result")
+        return json.loads(raw) if raw else None
+
+class InMemoryJobQueue:
+    """Pending jobs, run by this process's job workers."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._queue = None
+
+    def _get_queue(self) -> asyncio.Queue:
+        # Created on first use so it belongs to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        return self._queue
+
+    async def put(self, job_id: str, request: PDFRequest):
+        """Queue a job, raising asyncio.QueueFull when ``max_size`` are waiting."""
+        self._get_queue().put_nowait((job_id, request))
+
+    async def get(self):
+        return await self._get_queue().get()
+
+class RedisJobQueue:
+    """Same interface as InMemoryJobQueue, backed by a Redis list every worker process reads."""
+
+    key = "pdfjobs:queue"
+
+    def __init__(self, url: str, max_size: int):
+        import redis.asyncio as redis  # Optional dependency, only needed for JOB_STORE_URL
+        self.max_size = max_size
+        self._redis = redis.from_url(url)
+
+    async def put(self, job_id: str, request: PDFRequest):
+        if await self._redis.llen(self.key) >= self.max_size:
+            raise asyncio.QueueFull
+        await self._redis.lpush(self.key, json.dumps({"job_id": job_id, "request": request.model_dump()}))
+
+    async def get(self):
+        _, raw = await self._redis.brpop(self.key)
+        item = json.loads(raw)
+        return item["job_id"], PDFRequest.model_validate(item["request"])
+
+if JOB_STORE_URL:
+    job_store = RedisJobStore(JOB_STORE_URL, JOB_TTL)
+    job_queue = RedisJobQueue(JOB_STORE_URL, JOB_QUEUE_MAX)
+else:
+    job_store = InMemoryJobStore(JOB_TTL, JOB_RESULT_BYTES)
+    job_queue = InMemoryJobQueue(JOB_QUEUE_MAX)
+
+async def run_job(job_id: str, request: PDFRequest):
+    record = await job_store.get(job_id) or {"job_id": job_id, "pages_done": 0}
+    record["status"] = "running"
+    await job_store.put(job_id, record)
+    try:
+        spool = await download_pdf(request.pdf_url)
+        try:
+            pdf = await load_pdf(spool)
+            page_nums = parse_page_selection(request.pages, pdf.page_count)
+            await check_clip(pdf, request, page_nums)
+            record["pages_total"] = pdf.page_count if page_nums is None else len(page_nums)
+            await job_store.put(job_id, record)
+
+            body = new_json_body(request)
+            result_size = 0
+            async for page in page_records(pdf, request, page_nums):
+                result_size += page_json_size(add_page_to_body(body, page))
+                if result_size > JOB_MAX_RESULT_BYTES:
+                    raise HTTPException(status_code=413,
+                                        detail=f"Job result is larger than the {JOB_MAX_RESULT_BYTES} byte limit.")
+                if "tile" in page:
+                    record["tiles_done"] = record.get("tiles_done", 0) + 1
+                if completes_page(page):
+                    record["pages_done"] += 1
+                await job_store.put(job_id, record)
+        finally:
+            spool.close()
+
+        await job_store.put_result(job_id, body)
+        record["status"] = "done"
+    except HTTPException as e:
+        record.update(status="failed", status_code=e.status_code, error=e.detail)
+    except Exception as e:
+        record.update(status="failed", status_code=500, error=str(e))
+    record["finished_at"] = time.time()
+    await job_store.put(job_id, record)
+
+async def job_worker():
+    # Workers outlive the request that started them, so don't time into it
+    _stage_timings.set(None)
+    while True:
+        job_id, request = await job_queue.get()
+        await run_job(job_id, request)
+
+def start_job_workers():
+    while len(_job_workers) < JOB_WORKERS:
+        _job_workers.append(asyncio.ensure_future(job_worker()))
+
+@app.post("/jobs/", status_code=202)
+async def submit_job(request: PDFRequest):
+    """Queue a conversion and return its id for polling."""
+    validate_request(request)
+    start_job_workers()
+
+    job_id = uuid.uuid4().hex
+    record = {"job_id": job_id, "status": "queued", "pages_total": None, "pages_done": 0,
+              "created_at": time.time(), "finished_at": None}
+    await job_store.put(job_id, record)
+    try:
+        await job_queue.put(job_id, request)
+    except asyncio.QueueFull:
+        await job_store.put(job_id, dict(record, status="failed", status_code=503, error="Job queue is full."))
+        raise HTTPException(status_code=503, detail="Job queue is full. Please retry later.")
+    return record
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    record = await job_store.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return record
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    record = await job_store.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    if record["status"] == "failed":
+        raise HTTPException(status_code=record["status_code"], detail=record["error"])
+    if record["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is still {record['status']}.")
+    result = await job_store.get_result(job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job result expired.")
+    return result
+
+@app.post("/convert-pdf-to-png/stream")
+async def convert_pdf_to_png_stream(request: PDFRequest):
+    """Stream one NDJSON line per page as soon as it is rendered."""
+    validate_request(request)
+    request = request.model_copy(update={"response_format": "ndjson"})
+    return await respond_with_spooled_pages(await download_pdf(request.pdf_url), request, None)
+
+@app.get("/convert-pdf-to-png/page/{page_number}")
+async def convert_pdf_page_to_png(page_number: int, pdf_url: str, zoom: Optional[float] = None,
+                                  dpi: Optional[float] = None, max_width: Optional[int] = None,
+                                  max_height: Optional[int] = None, max_pixels: Optional[int] = None,
+                                  colorspace: Literal["rgb", "gray", "bilevel"] = "rgb", threshold: int = 128,
+                                  format: Literal["png", "jpeg", "webp"] = "png", quality: int = 85,
+                                  png_compress_level: Optional[int] = None, passthrough: bool = False,
+                                  clip: Optional[str] = None):
+    """Return a single 1-based page as a raw image body."""
+    request = PDFRequest(pdf_url=pdf_url, zoom=zoom, dpi=dpi, max_width=max_width,
+                         max_height=max_height, max_pixels=max_pixels,
+                         colorspace=colorspace, threshold=threshold, format=format,
+                         quality=quality, png_compress_level=png_compress_level,
+                         passthrough=passthrough, clip=clip)
+    validate_request(request)
+    spool = await download_pdf(pdf_url)
+    try:
+        pdf = await load_pdf(spool)
+        if page_number < 1 or page_number > pdf.page_count:
+            raise HTTPException(status_code=404, detail=f"Page {page_number} does not exist; the PDF has {pdf.page_count} pages.")
+        await check_clip(pdf, request, [page_number - 1])
+
+        options = render_options(request)
+        records = [record async for record in render_pages(pdf, options, [page_number - 1])]
+        return Response(content=records[0]["image"], media_type=records[0]["mime_type"])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        spool.close()
+
+@app.post("/pdf-metadata/")
+async def pdf_metadata(request: PDFMetadataRequest):
+    """Page count, sizes (in points), rotation, text and image presence."""
+    spool = await download_pdf(request.pdf_url)
+    try:
+        source, _ = spool.finish()
+        return await run_in_render_pool(describe_pdf, source)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        spool.close()
+
+@app.post("/extract-text/")
+async def extract_text(request: TextRequest):
+    """Return the native text layer per page without rasterizing anything.
+
+    Pages are split into chunks extracted in parallel on the render pool.
+    """
+    spool = await download_pdf(request.pdf_url)
+    try:
+        pdf = await load_pdf(spool)
+        page_nums = parse_page_selection(request.pages, pdf.page_count)
+        if page_nums is None:
+            page_nums = list(range(pdf.page_count))
+        chunk = chunk_pages(page_nums)
+        batches = [page_nums[start:start + chunk] for start in range(0, len(page_nums), chunk)]
+
+        with stage_timer("extract"):
+            results = await asyncio.gather(*[
+                run_in_render_pool(extract_text_batch, pdf.source, batch, request.words, request.blocks)
+                for batch in batches
+            ])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        spool.close()
+
+    return {
+        "message": "Extraction successful",
+        "page_count": pdf.page_count,
+        "pages": [page for batch in results for page in batch]
+    }
+
+@app.get("/metrics")
+async def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "render": render_cache.stats(),
+        "download": download_cache.stats()
+    }
 
 if __name__ == "__main__":
     import uvicorn
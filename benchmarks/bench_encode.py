@@ -0,0 +1,77 @@
+"""Per-page CPU time and peak memory: PIL round-trip versus direct pixmap PNG.
+
+Each (encoder, zoom) pair runs in a fresh process so peak RSS is not shared
+between measurements.
+
+    python benchmarks/bench_encode.py --pages 20 --zooms 2 3 4
+"""
+import argparse
+import io
+import multiprocessing
+import resource
+import time
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from synthetic import make_text_pdf
+
+import mainpdf
+
+
+def encode_with_pil(pix) -> bytes:
+    # The pre-optimisation path: copy samples into PIL, then re-encode
+    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    img_buffer = io.BytesIO()
+    img.save(img_buffer, format='PNG')
+    return img_buffer.getvalue()
+
+
+def encode_direct(pix) -> bytes:
+    return mainpdf.encode_pixmap(pix, mainpdf.RenderOptions())
+
+
+ENCODERS = {
+    "pil": encode_with_pil,
+    "pixmap": encode_direct,
+}
+
+
+def measure(encoder: str, zoom: int, pdf_bytes: bytes):
+    encode = ENCODERS[encoder]
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    mat = fitz.Matrix(zoom, zoom)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cpu = 0.0
+    out_bytes = 0
+    for page in doc:
+        pix = page.get_pixmap(matrix=mat)
+        started = time.process_time()
+        out_bytes += len(encode(pix))
+        cpu += time.process_time() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pages = doc.page_count
+    doc.close()
+    # ru_maxrss is in KiB on Linux
+    return cpu / pages, (rss_after - rss_before) / 1024, out_bytes / pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--zooms", type=int, nargs="+", default=[2, 3, 4])
+    args = parser.parse_args()
+
+    pdf_bytes = make_text_pdf(args.pages)
+    ctx = multiprocessing.get_context("spawn")
+
+    print(f"{'zoom':>4} {'encoder':>8} {'ms/page':>9} {'peak +MiB':>10} {'KiB/page':>9}")
+    for zoom in args.zooms:
+        for encoder in ENCODERS:
+            with ctx.Pool(1) as pool:
+                cpu, peak_mib, size = pool.apply(measure, (encoder, zoom, pdf_bytes))
+            print(f"{zoom:>4} {encoder:>8} {cpu * 1000:>9.1f} {peak_mib:>10.1f} {size / 1024:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
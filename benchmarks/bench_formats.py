@@ -0,0 +1,63 @@
+"""Encode time versus output size for each output format and setting.
+
+Renders every page once per document kind, then encodes the same pixmaps
+with each encoder configuration so only encoding is timed.
+
+    python benchmarks/bench_formats.py --pages 5 --zoom 2
+"""
+import argparse
+import time
+
+import fitz  # PyMuPDF
+
+from synthetic import make_scanned_pdf, make_text_pdf
+
+import mainpdf
+
+CONFIGS = [
+    {"format": "png"},
+    {"format": "png", "png_compress_level": 1},
+    {"format": "png", "png_compress_level": 6},
+    {"format": "png", "png_compress_level": 9},
+    {"format": "jpeg", "quality": 60},
+    {"format": "jpeg", "quality": 85},
+    {"format": "jpeg", "quality": 95},
+    {"format": "webp", "quality": 60},
+    {"format": "webp", "quality": 85},
+]
+
+DOCUMENTS = {
+    "text": make_text_pdf,
+    "scanned": make_scanned_pdf,
+}
+
+
+def label(config: dict) -> str:
+    settings = ",".join(f"{key}={value}" for key, value in config.items() if key != "format")
+    return f"{config['format']}({settings})" if settings else config["format"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--zoom", type=float, default=2)
+    parser.add_argument("--colorspace", choices=["rgb", "gray", "bilevel"], default="rgb")
+    args = parser.parse_args()
+
+    print(f"{'document':>8} {'encoder':>26} {'ms/page':>9} {'KiB/page':>9}")
+    for kind, make_pdf in DOCUMENTS.items():
+        doc = fitz.open(stream=make_pdf(args.pages), filetype="pdf")
+        base = mainpdf.RenderOptions(zoom=args.zoom, colorspace=args.colorspace)
+        colorspace = fitz.csRGB if args.colorspace == "rgb" else fitz.csGRAY
+        pixmaps = [page.get_pixmap(matrix=mainpdf.page_matrix(page, base), colorspace=colorspace) for page in doc]
+        for config in CONFIGS:
+            options = mainpdf.RenderOptions(zoom=args.zoom, colorspace=args.colorspace, **config)
+            started = time.perf_counter()
+            size = sum(len(mainpdf.encode_pixmap(pix, options)) for pix in pixmaps)
+            elapsed = time.perf_counter() - started
+            print(f"{kind:>8} {label(config):>26} {elapsed * 1000 / len(pixmaps):>9.1f} {size / 1024 / len(pixmaps):>9.0f}")
+        doc.close()
+
+
+if __name__ == "__main__":
+    main()
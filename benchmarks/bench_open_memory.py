@@ -0,0 +1,80 @@
+"""Peak RSS of opening and rendering a large PDF: BytesIO copy vs bytes vs path.
+
+Each strategy runs in a fresh process and reports how far peak RSS rose
+above the interpreter's baseline after opening the document and rendering
+its first page.
+
+    python benchmarks/bench_open_memory.py --pages 60
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import tempfile
+
+import fitz  # PyMuPDF
+
+from synthetic import make_scanned_pdf
+
+import mainpdf
+
+
+def open_bytesio(path: str):
+    # The original pipeline: response bytes wrapped in a BytesIO
+    with open(path, "rb") as f:
+        data = f.read()
+    return fitz.open(stream=io.BytesIO(data), filetype="pdf")
+
+
+def open_bytes(path: str):
+    with open(path, "rb") as f:
+        data = f.read()
+    return mainpdf._open_pdf(data)
+
+
+def open_path(path: str):
+    return mainpdf._open_pdf(path)
+
+
+STRATEGIES = {
+    "bytesio": open_bytesio,
+    "bytes": open_bytes,
+    "path": open_path,
+}
+
+
+def measure(strategy: str, path: str) -> float:
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    doc = STRATEGIES[strategy](path)
+    doc[0].get_pixmap()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    doc.close()
+    # ru_maxrss is in KiB on Linux
+    return (peak - baseline) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=60, help="about 1.5 MB of scan per page")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(make_scanned_pdf(args.pages))
+    size_mib = os.path.getsize(path) / 1024 / 1024
+
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        print(f"input: {size_mib:.0f} MiB, {args.pages} pages")
+        print(f"{'strategy':>8} {'peak +MiB':>10}")
+        for strategy in STRATEGIES:
+            with ctx.Pool(1) as pool:
+                peak_mib = pool.apply(measure, (strategy, path))
+            print(f"{strategy:>8} {peak_mib:>10.1f}")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
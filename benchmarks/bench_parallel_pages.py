@@ -0,0 +1,66 @@
+"""Pages/sec for one large document versus render worker count.
+
+Splits a synthetic document into page ranges the same way the service does
+and renders them on a process pool of 1, 2, 4, ... workers.
+
+    python benchmarks/bench_parallel_pages.py --pages 300 --zoom 2
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from synthetic import make_text_pdf
+
+import mainpdf
+
+
+def render_all(path: str, zoom: int, page_count: int, workers: int) -> int:
+    chunk = max(1, min(mainpdf.RENDER_CHUNK_PAGES, -(-page_count // workers)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        options = mainpdf.RenderOptions(zoom=zoom)
+        futures = [
+            pool.submit(mainpdf.render_page_batch, path, options,
+                        list(range(start, min(start + chunk, page_count))))
+            for start in range(0, page_count, chunk)
+        ]
+        # Reassemble in page order like the endpoint does
+        rendered = [record["page_number"] for future in futures for record in future.result()]
+    assert rendered == list(range(1, page_count + 1))
+    return len(rendered)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--zoom", type=int, default=2)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    worker_counts = []
+    workers = 1
+    while workers < args.max_workers:
+        worker_counts.append(workers)
+        workers *= 2
+    worker_counts.append(args.max_workers)
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(make_text_pdf(args.pages))
+
+    try:
+        print(f"{'workers':>8} {'seconds':>9} {'pages/sec':>10} {'speedup':>8}")
+        baseline = None
+        for workers in worker_counts:
+            started = time.perf_counter()
+            pages = render_all(path, args.zoom, args.pages, workers)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {pages / elapsed:>10.1f} {baseline / elapsed:>7.2f}x")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
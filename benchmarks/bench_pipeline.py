@@ -0,0 +1,164 @@
+"""Reproducible throughput benchmark for the conversion pipeline.
+
+Generates synthetic text, scanned and vector PDFs, converts each through
+``load_pdf`` / ``render_pages`` (render cache disabled) at every zoom and
+format, and writes pages/sec, p50/p99 document latency and peak RSS as JSON.
+Each case runs in a fresh interpreter so peak RSS is per case.
+
+    python benchmarks/bench_pipeline.py --output after.json
+    python benchmarks/bench_pipeline.py --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import MAKERS, make_pdf
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_case(path: str, zoom: float, image_format: str, repeat: int) -> dict:
+    """Convert ``path`` ``repeat`` times in this process and summarise."""
+    # Measure rendering, not cache lookups
+    os.environ["RENDER_CACHE_BYTES"] = "0"
+    os.environ.pop("RENDER_CACHE_DIR", None)
+    import mainpdf
+
+    with open(path, "rb") as f:
+        data = f.read()
+    options = mainpdf.render_options(mainpdf.RenderParams(zoom=zoom, format=image_format))
+    latencies = []
+    pages = 0
+
+    async def convert_all():
+        nonlocal pages
+        for _ in range(repeat):
+            started = time.perf_counter()
+            pdf = await mainpdf.load_pdf(mainpdf.SpooledPDF.from_bytes(data))
+            pages = 0
+            async for _record in mainpdf.render_pages(pdf, options):
+                pages += 1
+            latencies.append(time.perf_counter() - started)
+
+    asyncio.run(convert_all())
+    if mainpdf._render_executor is not None:
+        mainpdf._render_executor.shutdown()
+
+    # ru_maxrss is in KiB on Linux; children covers process-pool workers
+    return {
+        "pages": pages,
+        "pages_per_sec": pages * len(latencies) / sum(latencies),
+        "p50_seconds": statistics.median(latencies),
+        "p99_seconds": percentile(latencies, 0.99),
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_worker_rss_mib": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def environment() -> dict:
+    import fitz
+    import PIL
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pymupdf": fitz.VersionBind,
+        "pillow": PIL.__version__,
+        "render_executor": os.getenv("RENDER_EXECUTOR", "process"),
+    }
+
+
+def run_suite(args) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as corpus:
+        for kind in args.kinds:
+            for pages in args.pages:
+                path = os.path.join(corpus, f"{kind}-{pages}.pdf")
+                with open(path, "wb") as f:
+                    f.write(make_pdf(kind, pages))
+                for zoom in args.zooms:
+                    for image_format in args.formats:
+                        case = {"kind": kind, "pages": pages, "zoom": zoom, "format": image_format}
+                        completed = subprocess.run(
+                            [sys.executable, __file__, "--run-case", path, str(zoom), image_format, str(args.repeat)],
+                            capture_output=True, text=True, check=True,
+                        )
+                        # Libraries may print banners first; the result is the last line
+                        case.update(json.loads(completed.stdout.splitlines()[-1]))
+                        results.append(case)
+                        print(f"{kind:>8} {pages:>4}p zoom {zoom:<4} {image_format:>5}: "
+                              f"{case['pages_per_sec']:8.1f} pages/s  p99 {case['p99_seconds']:7.3f}s  "
+                              f"rss {case['peak_rss_mib']:6.0f} MiB", file=sys.stderr)
+    return {"environment": environment(), "results": results}
+
+
+def case_key(case: dict) -> tuple:
+    return case["kind"], case["pages"], case["zoom"], case["format"]
+
+
+def compare(before_path: str, after_path: str, tolerance: float) -> int:
+    """Print per-case ratios; return 1 if any case regressed past ``tolerance``."""
+    with open(before_path) as f:
+        before = {case_key(case): case for case in json.load(f)["results"]}
+    with open(after_path) as f:
+        after = {case_key(case): case for case in json.load(f)["results"]}
+
+    regressed = False
+    print(f"{'case':>32} {'pages/s':>9} {'p99':>9} {'rss':>9}")
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        throughput = new["pages_per_sec"] / old["pages_per_sec"]
+        p99 = new["p99_seconds"] / old["p99_seconds"]
+        rss = new["peak_rss_mib"] / old["peak_rss_mib"]
+        flag = ""
+        if throughput < 1 - tolerance or p99 > 1 + tolerance or rss > 1 + tolerance:
+            regressed = True
+            flag = "  REGRESSED"
+        label = "{} {}p zoom {} {}".format(*key)
+        print(f"{label:>32} {throughput:>8.2f}x {p99:>8.2f}x {rss:>8.2f}x{flag}")
+    return 1 if regressed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kinds", nargs="+", choices=sorted(MAKERS), default=["text", "scanned", "vector"])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--zooms", type=float, nargs="+", default=[1, 2])
+    parser.add_argument("--formats", nargs="+", choices=["png", "jpeg", "webp"], default=["png", "jpeg"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative slowdown")
+    parser.add_argument("--run-case", nargs=4, metavar=("PATH", "ZOOM", "FORMAT", "REPEAT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        path, zoom, image_format, repeat = args.run_case
+        result = run_case(path, float(zoom), image_format, int(repeat))
+        print(json.dumps(result), flush=True)
+        return
+    if args.compare:
+        sys.exit(compare(*args.compare, args.tolerance))
+
+    report = json.dumps(run_suite(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
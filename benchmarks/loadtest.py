@@ -0,0 +1,219 @@
+"""HTTP load test of the FastAPI app against a local PDF origin.
+
+Serves a generated PDF corpus from a local static file server, starts the
+app under uvicorn, and drives POST /convert-pdf-to-png/ either closed-loop
+(a fixed number of concurrent clients) or open-loop (Poisson arrivals at a
+fixed rate). Reports throughput, latency percentiles, error rate, the
+latency of a cheap probe endpoint (event-loop stalls show up there), and
+server RSS (including render workers) over time.
+
+    python benchmarks/loadtest.py --concurrency 16 --duration 60
+    python benchmarks/loadtest.py --rate 5 --duration 60 --output load.json
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from synthetic import API_DIR, MAKERS, make_pdf
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_origin(directory: str) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_tree_rss_mib(pid: int) -> float:
+    """RSS of ``pid`` plus all its descendants, read from /proc."""
+    total_kib = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kib += int(line.split()[1])
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return total_kib / 1024
+
+
+def percentile(values: list, fraction: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+async def wait_until_up(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{base_url}/cache/stats")
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def drive(args, base_url: str, pdf_urls: list, server_pid: int) -> dict:
+    results = []
+    probes = []
+    rss = []
+    started = time.monotonic()
+    deadline = started + args.duration
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+
+        async def one_request():
+            body = {"pdf_url": random.choice(pdf_urls), "zoom": args.zoom, "format": args.format}
+            sent = time.monotonic()
+            try:
+                response = await client.post(f"{base_url}/convert-pdf-to-png/", json=body)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            results.append({"sent": sent - started, "latency": time.monotonic() - sent, "status": status})
+
+        async def closed_loop_client():
+            while time.monotonic() < deadline:
+                await one_request()
+
+        async def open_loop():
+            in_flight = set()
+            while time.monotonic() < deadline:
+                task = asyncio.ensure_future(one_request())
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+                await asyncio.sleep(random.expovariate(args.rate))
+            if in_flight:
+                await asyncio.wait(in_flight)
+
+        async def probe():
+            while time.monotonic() < deadline:
+                sent = time.monotonic()
+                try:
+                    await client.get(f"{base_url}/cache/stats")
+                    probes.append(time.monotonic() - sent)
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.25)
+
+        async def sample_rss():
+            while time.monotonic() < deadline:
+                rss.append({"t": round(time.monotonic() - started, 2), "rss_mib": round(process_tree_rss_mib(server_pid), 1)})
+                await asyncio.sleep(args.rss_interval)
+
+        load = [open_loop()] if args.rate else [closed_loop_client() for _ in range(args.concurrency)]
+        await asyncio.gather(*load, probe(), sample_rss())
+
+    elapsed = time.monotonic() - started
+    latencies = [result["latency"] for result in results if result["status"] == 200]
+    errors = [result for result in results if result["status"] != 200]
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "requests": len(results),
+        "throughput_rps": len(latencies) / elapsed,
+        "error_rate": len(errors) / len(results) if results else 0.0,
+        "errors_by_status": {str(status): sum(1 for e in errors if e["status"] == status)
+                             for status in {e["status"] for e in errors}},
+        "latency_seconds": {"p50": percentile(latencies, 0.5), "p95": percentile(latencies, 0.95),
+                            "p99": percentile(latencies, 0.99), "max": max(latencies, default=None)},
+        "probe_latency_seconds": {"p50": percentile(probes, 0.5), "p99": percentile(probes, 0.99),
+                                  "max": max(probes, default=None)},
+        "peak_rss_mib": max((sample["rss_mib"] for sample in rss), default=None),
+        "rss_timeline": rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kinds", nargs="+", choices=sorted(MAKERS), default=["text", "scanned"])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--concurrency", type=int, default=8, help="closed-loop clients")
+    parser.add_argument("--rate", type=float, help="open-loop arrivals per second (overrides --concurrency)")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--zoom", type=float, default=2)
+    parser.add_argument("--format", choices=["png", "jpeg", "webp"], default="png")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--rss-interval", type=float, default=0.5)
+    parser.add_argument("--cache", action="store_true", help="leave the render cache enabled")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as corpus:
+        names = []
+        for kind in args.kinds:
+            for pages in args.pages:
+                name = f"{kind}-{pages}.pdf"
+                with open(os.path.join(corpus, name), "wb") as f:
+                    f.write(make_pdf(kind, pages))
+                names.append(name)
+
+        origin = start_origin(corpus)
+        origin_url = f"http://127.0.0.1:{origin.server_address[1]}"
+        pdf_urls = [f"{origin_url}/{name}" for name in names]
+
+        port = free_port()
+        env = dict(os.environ)
+        if not args.cache:
+            env["RENDER_CACHE_BYTES"] = "0"
+            env.pop("RENDER_CACHE_DIR", None)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "mainpdf:app", "--app-dir", str(API_DIR),
+             "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            env=env,
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            asyncio.run(wait_until_up(base_url))
+            report = asyncio.run(drive(args, base_url, pdf_urls, server.pid))
+        finally:
+            server.terminate()
+            server.wait()
+            origin.shutdown()
+
+    summary = report["latency_seconds"]
+    print(f"requests {report['requests']}  throughput {report['throughput_rps']:.2f} req/s  "
+          f"errors {report['error_rate']:.1%}", file=sys.stderr)
+    print(f"latency p50 {summary['p50']}  p95 {summary['p95']}  p99 {summary['p99']}  "
+          f"probe p99 {report['probe_latency_seconds']['p99']}  peak rss {report['peak_rss_mib']} MiB",
+          file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
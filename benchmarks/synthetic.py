@@ -0,0 +1,82 @@
+"""Synthetic claim-like PDFs for the benchmark scripts."""
+import io
+import sys
+from pathlib import Path
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+# Make mainpdf importable from the benchmark scripts
+API_DIR = Path(__file__).resolve().parent.parent / "api" / "pdf-to-png-api-pureclaim"
+sys.path.insert(0, str(API_DIR))
+
+LOREM = (
+    "Claim number 000123 - patient services rendered, itemized charges follow. "
+    "Procedure code, date of service, units, billed amount, allowed amount. "
+)
+
+
+def make_text_pdf(pages: int) -> bytes:
+    """Return a Letter-sized PDF with ``pages`` pages of dense text."""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=612, height=792)
+        body = f"Page {page_num + 1}\n" + LOREM * 40
+        page.insert_textbox(fitz.Rect(36, 36, 576, 756), body, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_scanned_pdf(pages: int, dpi: int = 200) -> bytes:
+    """Return a PDF whose pages are each one full-page photo-like JPEG."""
+    size = (int(8.5 * dpi), 11 * dpi)
+    doc = fitz.open()
+    for page_num in range(pages):
+        # Noise over a gradient compresses roughly like a real scan
+        gradient = Image.linear_gradient("L").resize(size)
+        noise = Image.effect_noise(size, 24 + page_num % 8)
+        scan = Image.merge("RGB", (gradient, noise, Image.blend(gradient, noise, 0.5)))
+        buffer = io.BytesIO()
+        scan.save(buffer, format="JPEG", quality=80)
+        page = doc.new_page(width=612, height=792)
+        page.insert_image(page.rect, stream=buffer.getvalue())
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_vector_pdf(pages: int) -> bytes:
+    """Return a PDF whose pages are dense line art, like forms and drawings."""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=612, height=792)
+        shape = page.new_shape()
+        # A grid of form cells plus diagonal hatching and circles
+        for x in range(36, 577, 18):
+            shape.draw_line((x, 36), (x, 756))
+        for y in range(36, 757, 12):
+            shape.draw_line((36, y), (576, y))
+        shape.finish(color=(0, 0, 0), width=0.3)
+        for offset in range(0, 1300, 9):
+            shape.draw_line((36 + offset, 36), (36 + offset - 720, 756))
+        shape.finish(color=(0.4, 0.4, 0.8), width=0.2)
+        for index in range(40):
+            shape.draw_circle((72 + (index * 37) % 480, 96 + (index * 53 + page_num) % 600), 8 + index % 20)
+        shape.finish(color=(0.8, 0, 0), fill=(1, 0.9, 0.9), width=0.5)
+        shape.commit()
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+MAKERS = {
+    "text": make_text_pdf,
+    "scanned": make_scanned_pdf,
+    "vector": make_vector_pdf,
+}
+
+
+def make_pdf(kind: str, pages: int) -> bytes:
+    """Return a ``pages``-page synthetic PDF of the given kind (see MAKERS)."""
+    return MAKERS[kind](pages)
@@ -0,0 +1,110 @@
+"""Shared fixtures: mainpdf on sys.path, a local HTTP origin serving PDFs and an app client."""
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+API_DIR = ROOT / "api" / "pdf-to-png-api-pureclaim"
+sys.path.insert(0, str(API_DIR))
+# The benchmark PDF generators double as test fixtures
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+# Render on a thread: no worker processes to spawn for every test
+os.environ.setdefault("RENDER_EXECUTOR", "thread")
+
+import mainpdf  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    """Serve ``server.files``, honouring ETag / Last-Modified revalidation."""
+
+    def do_GET(self):
+        self.server.requests.append((self.path, {name.lower(): value for name, value in self.headers.items()}))
+        entry = self.server.files.get(self.path)
+        if entry is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        etag = entry.get("etag")
+        last_modified = entry.get("last_modified")
+        if ((etag and self.headers.get("If-None-Match") == etag)
+                or (last_modified and self.headers.get("If-Modified-Since") == last_modified)):
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        # Without a length the body runs until the connection closes
+        if not entry.get("no_length"):
+            self.send_header("Content-Length", str(len(entry["body"])))
+        if etag:
+            self.send_header("ETag", etag)
+        if last_modified:
+            self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(entry["body"])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def origin():
+    """A threaded HTTP server on localhost; set ``files`` and ``delay`` on it."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OriginHandler)
+    server.daemon_threads = True
+    server.files = {}
+    server.requests = []
+    server.delay = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fresh_download_cache(monkeypatch):
+    cache = mainpdf.DownloadCache(64 * 1024 * 1024)
+    monkeypatch.setattr(mainpdf, "download_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine on a new event loop with its own download client."""
+    def run(coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                if mainpdf._http_client is not None:
+                    await mainpdf._http_client.aclose()
+                    mainpdf._http_client = None
+        return asyncio.run(main())
+    return run
+
+
+@pytest.fixture
+def client(monkeypatch, fresh_download_cache):
+    """A TestClient with empty caches and job state, run for the whole test."""
+    monkeypatch.setattr(mainpdf, "render_cache", mainpdf.RenderCache(64 * 1024 * 1024))
+    monkeypatch.setattr(mainpdf, "job_store", mainpdf.InMemoryJobStore(60, 64 * 1024 * 1024))
+    monkeypatch.setattr(mainpdf, "job_queue", mainpdf.InMemoryJobQueue(10))
+    # Loop-bound asyncio state must belong to this client's event loop
+    monkeypatch.setattr(mainpdf, "_render_slots", asyncio.Semaphore(mainpdf.RENDER_QUEUE_DEPTH))
+    with TestClient(mainpdf.app) as test_client:
+        yield test_client
@@ -0,0 +1,47 @@
+"""Small PDFs built with fitz for the tests."""
+import io
+
+import fitz  # PyMuPDF
+from PIL import Image
+from synthetic import LOREM
+
+
+def make_jpeg(mode: str = "RGB") -> bytes:
+    # Same aspect ratio as a Letter page, so it fills the page exactly
+    image = Image.linear_gradient("L").resize((850, 1100)).convert(mode)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+
+def add_text_page(doc):
+    page = doc.new_page(width=612, height=792)
+    page.insert_textbox(fitz.Rect(36, 36, 576, 756), LOREM * 20, fontsize=9)
+    return page
+
+
+def add_image_page(doc, image: bytes, rect=None):
+    page = doc.new_page(width=612, height=792)
+    page.insert_image(rect or page.rect, stream=image)
+    return page
+
+
+def add_stamped_image_page(doc, image: bytes):
+    """A scan with a short line of real text on top, like a PAID stamp."""
+    page = add_image_page(doc, image)
+    page.insert_text((36, 36), "PAID 2025-01-14 claim 000123", fontsize=8)
+    return page
+
+
+def build_pdf(*builders) -> bytes:
+    """Return a PDF with one page per ``builder(doc)`` call, in order."""
+    doc = fitz.open()
+    for builder in builders:
+        builder(doc)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def one_image_pdf(image: bytes, rect=None) -> bytes:
+    return build_pdf(lambda doc: add_image_page(doc, image, rect))
@@ -0,0 +1,70 @@
+import asyncio
+
+import fitz  # PyMuPDF
+import pytest
+from pdfs import add_image_page, add_stamped_image_page, add_text_page, build_pdf, make_jpeg
+
+import mainpdf
+from mainpdf import LoadedPDF, RenderOptions, classify_page, pdf_digest
+
+
+@pytest.fixture
+def fresh_render_state(monkeypatch):
+    monkeypatch.setattr(mainpdf, "render_cache", mainpdf.RenderCache(64 * 1024 * 1024))
+    monkeypatch.setattr(mainpdf, "_render_slots", asyncio.Semaphore(mainpdf.RENDER_QUEUE_DEPTH))
+
+
+def classify(builder) -> dict:
+    with fitz.open(stream=build_pdf(builder), filetype="pdf") as doc:
+        return classify_page(doc[0])
+
+
+def test_text_page_keeps_its_text():
+    page = classify(add_text_page)
+    assert not page["needs_render"]
+    assert "Claim number" in page["text"]
+    assert page["image_coverage"] == 0
+
+
+def test_full_page_image_is_rendered():
+    page = classify(lambda doc: add_image_page(doc, make_jpeg()))
+    assert page["needs_render"]
+    assert page["text"] is None
+    assert page["image_coverage"] == pytest.approx(1.0)
+
+
+def test_stamped_scan_is_rendered():
+    page = classify(lambda doc: add_stamped_image_page(doc, make_jpeg()))
+    # Enough characters, but they cover almost nothing of a page-sized image
+    assert page["needs_render"]
+    assert page["text_coverage"] < mainpdf.AUTO_MIN_TEXT_COVERAGE
+
+
+def mixed_pdf() -> LoadedPDF:
+    jpeg = make_jpeg()
+    source = build_pdf(add_text_page, lambda doc: add_image_page(doc, jpeg),
+                       add_text_page, lambda doc: add_stamped_image_page(doc, jpeg))
+    return LoadedPDF(source=source, digest=pdf_digest(source), page_count=4)
+
+
+def auto_records(options: RenderOptions) -> list:
+    async def collect():
+        return [record async for record in mainpdf.auto_pages(mixed_pdf(), options)]
+    return asyncio.run(collect())
+
+
+def test_auto_mode_interleaves_in_page_order(fresh_render_state):
+    records = auto_records(RenderOptions(zoom=0.5))
+
+    assert [record["page_number"] for record in records] == [1, 2, 3, 4]
+    assert ["text" in record for record in records] == [True, False, True, False]
+    assert records[1]["mime_type"] == "image/png"
+
+
+def test_auto_mode_keeps_tiles_of_a_page_together(fresh_render_state):
+    records = auto_records(RenderOptions(zoom=1, tile_size=256))
+
+    # 612 x 792 pixels make a 4 x 3 grid per rendered page
+    assert [record["page_number"] for record in records] == [1] + [2] * 12 + [3] + [4] * 12
+    tiles = [(record["tile"]["row"], record["tile"]["col"]) for record in records if record["page_number"] == 2]
+    assert tiles == [(row, col) for row in range(4) for col in range(3)]
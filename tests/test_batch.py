@@ -0,0 +1,37 @@
+import json
+
+from synthetic import make_text_pdf
+
+import mainpdf
+
+
+def batch_lines(response):
+    return sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+
+
+def test_batch_reports_errors_per_item(client, origin):
+    origin.files["/claim.pdf"] = {"body": make_text_pdf(2)}
+    response = client.post("/convert-pdf-to-png/batch", json={"requests": [
+        {"pdf_url": origin.url + "/claim.pdf", "zoom": 0.5},
+        {"pdf_url": origin.url + "/claim.pdf", "zoom": "x"},
+        {"pdf_url": origin.url + "/missing.pdf"},
+    ]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    converted, invalid, missing = batch_lines(response)
+
+    assert converted["index"] == 0
+    assert [image["page_number"] for image in converted["images"]] == [1, 2]
+    assert "status_code" not in converted
+
+    assert invalid["index"] == 1 and invalid["status_code"] == 422
+    assert invalid["error"][0]["loc"] == ["zoom"]
+
+    assert missing["index"] == 2 and missing["status_code"] == 400
+
+
+def test_batch_over_the_item_limit_is_400(client, monkeypatch):
+    monkeypatch.setattr(mainpdf, "BATCH_MAX_ITEMS", 2)
+    response = client.post("/convert-pdf-to-png/batch", json={"requests": [{"pdf_url": "x"}] * 3})
+    assert response.status_code == 400
@@ -0,0 +1,60 @@
+import asyncio
+import os
+import tempfile
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import mainpdf
+
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 4096
+
+
+def test_concurrent_downloads_overlap(origin, fresh_download_cache, run):
+    origin.files["/slow.pdf"] = {"body": PDF_BYTES}
+    origin.delay = 0.5
+    downloads = 8
+
+    async def fetch_all():
+        started = time.perf_counter()
+        spools = await asyncio.gather(*[mainpdf.download_pdf(origin.url + "/slow.pdf")
+                                        for _ in range(downloads)])
+        return time.perf_counter() - started, spools
+
+    elapsed, spools = run(fetch_all())
+
+    assert all(spool.finish()[0] == PDF_BYTES for spool in spools)
+    # Serial downloads would take downloads * delay (4 s)
+    assert elapsed < origin.delay * 3
+
+
+def test_download_errors_are_400(origin, fresh_download_cache, run):
+    with pytest.raises(HTTPException) as excinfo:
+        run(mainpdf.download_pdf(origin.url + "/missing.pdf"))
+    assert excinfo.value.status_code == 400
+
+
+def test_oversize_body_without_length_removes_spool_file(origin, fresh_download_cache, run, monkeypatch):
+    monkeypatch.setattr(mainpdf, "SPOOL_THRESHOLD", 1024)
+    monkeypatch.setattr(mainpdf, "MAX_PDF_BYTES", 64 * 1024)
+    origin.files["/huge.pdf"] = {"body": b"%PDF-1.4\n" + b"0" * (256 * 1024), "no_length": True}
+
+    spool_paths = []
+    mkstemp = tempfile.mkstemp
+
+    def recording_mkstemp(*args, **kwargs):
+        fd, path = mkstemp(*args, **kwargs)
+        spool_paths.append(path)
+        return fd, path
+
+    monkeypatch.setattr(tempfile, "mkstemp", recording_mkstemp)
+
+    # The traceback kept by excinfo holds the spool, so only an explicit
+    # close (not weakref.finalize) can have removed the file
+    with pytest.raises(HTTPException) as excinfo:
+        run(mainpdf.download_pdf(origin.url + "/huge.pdf"))
+
+    assert excinfo.value.status_code == 413
+    assert len(spool_paths) == 1
+    assert not os.path.exists(spool_paths[0])
@@ -0,0 +1,84 @@
+import mainpdf
+
+PDF_V1 = b"%PDF-1.4\n" + b"1" * 2048
+PDF_V2 = b"%PDF-1.4\n" + b"2" * 2048
+
+
+def fetch_twice(origin, path, run):
+    async def fetch():
+        first = await mainpdf.download_pdf(origin.url + path)
+        second = await mainpdf.download_pdf(origin.url + path)
+        return first.finish()[0], second.finish()[0]
+    return run(fetch())
+
+
+def test_etag_revalidation_reuses_cached_bytes(origin, fresh_download_cache, run):
+    origin.files["/claim.pdf"] = {"body": PDF_V1, "etag": '"v1"'}
+
+    first, second = fetch_twice(origin, "/claim.pdf", run)
+
+    assert first == second == PDF_V1
+    assert "if-none-match" not in origin.requests[0][1]
+    assert origin.requests[1][1]["if-none-match"] == '"v1"'
+    assert fresh_download_cache.downloads == 1
+    assert fresh_download_cache.revalidated == 1
+
+
+def test_last_modified_revalidation(origin, fresh_download_cache, run):
+    last_modified = "Wed, 01 Jan 2025 00:00:00 GMT"
+    origin.files["/claim.pdf"] = {"body": PDF_V1, "last_modified": last_modified}
+
+    first, second = fetch_twice(origin, "/claim.pdf", run)
+
+    assert first == second == PDF_V1
+    assert origin.requests[1][1]["if-modified-since"] == last_modified
+    assert fresh_download_cache.revalidated == 1
+
+
+def test_changed_body_replaces_entry(origin, fresh_download_cache, run):
+    url = origin.url + "/claim.pdf"
+    origin.files["/claim.pdf"] = {"body": PDF_V1, "etag": '"v1"'}
+
+    async def fetch_before_and_after_change():
+        first = await mainpdf.download_pdf(url)
+        origin.files["/claim.pdf"] = {"body": PDF_V2, "etag": '"v2"'}
+        second = await mainpdf.download_pdf(url)
+        return first.finish()[0], second.finish()[0]
+
+    first, second = run(fetch_before_and_after_change())
+
+    assert (first, second) == (PDF_V1, PDF_V2)
+    assert origin.requests[1][1]["if-none-match"] == '"v1"'
+    entry = fresh_download_cache.get(url)
+    assert (entry.data, entry.etag) == (PDF_V2, '"v2"')
+    assert fresh_download_cache.downloads == 2
+    assert fresh_download_cache.revalidated == 0
+
+
+def test_responses_without_validators_are_not_cached(origin, fresh_download_cache, run):
+    origin.files["/claim.pdf"] = {"body": PDF_V1}
+
+    fetch_twice(origin, "/claim.pdf", run)
+
+    assert "if-none-match" not in origin.requests[1][1]
+    assert fresh_download_cache.stats()["entries"] == 0
+
+
+def cached(data: bytes) -> mainpdf.CachedDownload:
+    return mainpdf.CachedDownload(data, mainpdf.pdf_digest(data), '"etag"', None, len(data))
+
+
+def test_lru_eviction_stays_under_max_bytes():
+    cache = mainpdf.DownloadCache(max_bytes=250)
+    cache.put("a", cached(b"a" * 100))
+    cache.put("b", cached(b"b" * 100))
+    cache.get("a")  # Now b is the least recently used
+    cache.put("c", cached(b"c" * 100))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] == 200
+
+    cache.put("huge", cached(b"h" * 300))
+    assert cache.get("huge") is None
+    assert cache.stats()["bytes"] <= 250
@@ -0,0 +1,32 @@
+from synthetic import make_text_pdf
+
+
+def test_extract_text_returns_word_and_block_boxes(client, origin):
+    origin.files["/claim.pdf"] = {"body": make_text_pdf(2)}
+    response = client.post("/extract-text/", json={"pdf_url": origin.url + "/claim.pdf"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["page_count"] == 2
+    assert [page["page_number"] for page in body["pages"]] == [1, 2]
+
+    for page in body["pages"]:
+        assert page["text"].strip()
+        assert page["words"] and page["blocks"]
+        for box in page["words"] + page["blocks"]:
+            x0, y0, x1, y1 = box["bbox"]
+            assert 0 <= x0 <= x1 <= page["width"]
+            assert 0 <= y0 <= y1 <= page["height"]
+        assert {block["type"] for block in page["blocks"]} == {"text"}
+        assert [word["text"] for word in page["words"][:2]] == ["Page", str(page["page_number"])]
+
+
+def test_extract_text_can_skip_words_and_select_pages(client, origin):
+    origin.files["/claim.pdf"] = {"body": make_text_pdf(3)}
+    response = client.post("/extract-text/", json={"pdf_url": origin.url + "/claim.pdf",
+                                                   "pages": "2", "words": False})
+
+    pages = response.json()["pages"]
+    assert [page["page_number"] for page in pages] == [2]
+    assert "words" not in pages[0]
+    assert pages[0]["blocks"]
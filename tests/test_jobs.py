@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from synthetic import make_text_pdf
+
+import mainpdf
+
+
+def wait_for_job(client, job_id: str, timeout: float = 30) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        record = client.get(f"/jobs/{job_id}").json()
+        if record["status"] in ("done", "failed") or time.monotonic() > deadline:
+            return record
+        time.sleep(0.05)
+
+
+def test_submit_status_result(client, origin):
+    origin.files["/claim.pdf"] = {"body": make_text_pdf(2)}
+
+    submitted = client.post("/jobs/", json={"pdf_url": origin.url + "/claim.pdf", "zoom": 0.5})
+    assert submitted.status_code == 202
+    assert submitted.json()["status"] == "queued"
+
+    record = wait_for_job(client, submitted.json()["job_id"])
+    assert record["status"] == "done"
+    assert record["pages_done"] == record["pages_total"] == 2
+
+    result = client.get(f"/jobs/{record['job_id']}/result")
+    assert result.status_code == 200
+    images = result.json()["images"]
+    assert [image["page_number"] for image in images] == [1, 2]
+    assert all(image["data_url"].startswith("data:image/png;base64,") for image in images)
+
+
+def test_result_over_cap_fails_the_job(client, origin, monkeypatch):
+    monkeypatch.setattr(mainpdf, "JOB_MAX_RESULT_BYTES", 100)
+    origin.files["/claim.pdf"] = {"body": make_text_pdf(3)}
+
+    job_id = client.post("/jobs/", json={"pdf_url": origin.url + "/claim.pdf", "zoom": 0.5}).json()["job_id"]
+    record = wait_for_job(client, job_id)
+
+    assert (record["status"], record["status_code"]) == ("failed", 413)
+    # Aborted on the first page instead of rendering the whole document
+    assert record["pages_done"] == 0
+    assert client.get(f"/jobs/{job_id}/result").status_code == 413
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/jobs/nope").status_code == 404
+    assert client.get("/jobs/nope/result").status_code == 404
+
+
+def result_of(size: int) -> dict:
+    return {"message": "Conversion successful", "images": [{"page_number": 1, "data_url": "x" * size}]}
+
+
+def test_store_refuses_a_result_over_max_bytes():
+    store = mainpdf.InMemoryJobStore(ttl=60, max_bytes=50)
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(store.put_result("job", result_of(100)))
+    assert excinfo.value.status_code == 413
+
+
+def test_store_drops_oldest_results_past_max_bytes():
+    async def scenario():
+        store = mainpdf.InMemoryJobStore(ttl=60, max_bytes=150)
+        await store.put_result("first", result_of(100))
+        await store.put_result("second", result_of(100))
+        return await store.get_result("first"), await store.get_result("second")
+
+    first, second = asyncio.run(scenario())
+    assert first is None
+    assert second == result_of(100)
+
+
+def test_store_ttl_eviction():
+    async def scenario():
+        store = mainpdf.InMemoryJobStore(ttl=0.05, max_bytes=1000)
+        await store.put("job", {"job_id": "job", "status": "done"})
+        await store.put_result("job", result_of(10))
+        kept = await store.get("job")
+        await asyncio.sleep(0.1)
+        return kept, await store.get("job"), await store.get_result("job")
+
+    kept, record, result = asyncio.run(scenario())
+    assert kept["status"] == "done"
+    assert record is None and result is None
@@ -0,0 +1,31 @@
+from prometheus_client import CONTENT_TYPE_LATEST
+from synthetic import make_text_pdf
+
+
+def test_include_timings_adds_stage_seconds(client, origin):
+    origin.files["/claim.pdf"] = {"body": make_text_pdf(2)}
+    request = {"pdf_url": origin.url + "/claim.pdf", "zoom": 0.5}
+
+    plain = client.post("/convert-pdf-to-png/", json=request).json()
+    assert "timings" not in plain
+
+    timed = client.post("/convert-pdf-to-png/", json={**request, "include_timings": True}).json()
+    timings = timed["timings"]
+    assert {"download", "open", "render", "encode"} <= set(timings)
+    assert all(seconds >= 0 for seconds in timings.values())
+
+
+def test_metrics_exposes_stage_histogram_and_counters(client, origin):
+    origin.files["/claim.pdf"] = {"body": make_text_pdf(1)}
+    client.post("/convert-pdf-to-png/", json={"pdf_url": origin.url + "/claim.pdf", "zoom": 0.5})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE_LATEST
+    text = response.text
+    assert "pdf_stage_seconds_bucket{" in text
+    assert 'stage="render"' in text
+    for name in ("pdf_pages_rendered_total", "pdf_bytes_in_total", "pdf_image_bytes_out_total",
+                 "pdf_render_cache_hit_ratio", "pdf_download_cache_hit_ratio"):
+        assert name in text
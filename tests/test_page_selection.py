@@ -0,0 +1,26 @@
+import pytest
+from fastapi import HTTPException
+
+from mainpdf import parse_page_selection
+
+
+@pytest.mark.parametrize("pages, expected", [
+    (None, None),
+    ("", None),
+    ("7", [6]),
+    ("1-3", [0, 1, 2]),
+    ("8-", [7, 8, 9]),
+    ("-2", [8]),
+    ("-3--1", [7, 8, 9]),
+    ("3, 1-2, 3", [2, 0, 1]),
+    ([2, -1, 2], [1, 9]),
+])
+def test_selection(pages, expected):
+    assert parse_page_selection(pages, 10) == expected
+
+
+@pytest.mark.parametrize("pages", ["0", "11", "-11", "3-2", "a", "1-x", [12]])
+def test_invalid_selection_is_400(pages):
+    with pytest.raises(HTTPException) as excinfo:
+        parse_page_selection(pages, 10)
+    assert excinfo.value.status_code == 400
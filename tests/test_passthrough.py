@@ -0,0 +1,74 @@
+import asyncio
+
+import fitz  # PyMuPDF
+import pytest
+from pdfs import make_jpeg, one_image_pdf
+from synthetic import make_text_pdf
+
+import mainpdf
+from mainpdf import LoadedPDF, RenderOptions, pdf_digest, render_page_batch, single_image_xref
+
+
+def first_page_xref(pdf: bytes):
+    with fitz.open(stream=pdf, filetype="pdf") as doc:
+        return single_image_xref(doc[0])
+
+
+def test_single_image_detection():
+    assert first_page_xref(one_image_pdf(make_jpeg())) is not None
+    assert first_page_xref(make_text_pdf(1)) is None
+    assert first_page_xref(one_image_pdf(make_jpeg(), fitz.Rect(0, 0, 306, 396))) is None
+
+
+def test_matching_jpeg_is_returned_byte_for_byte():
+    jpeg = make_jpeg()
+    records = render_page_batch(one_image_pdf(jpeg), RenderOptions(format="jpeg", quality=85, passthrough=True), [0])
+
+    assert records[0]["image"] == jpeg
+    assert records[0]["mime_type"] == "image/jpeg"
+    assert "extract" in records[0]["timings"]
+
+
+def test_gray_jpeg_passes_through_for_gray_requests():
+    jpeg = make_jpeg("L")
+    options = RenderOptions(format="jpeg", quality=85, colorspace="gray", passthrough=True)
+    assert render_page_batch(one_image_pdf(jpeg), options, [0])[0]["image"] == jpeg
+
+
+@pytest.mark.parametrize("options", [
+    RenderOptions(format="png", passthrough=True),
+    RenderOptions(format="webp", quality=85, passthrough=True),
+    RenderOptions(format="jpeg", quality=85, colorspace="gray", passthrough=True),
+    RenderOptions(format="jpeg", quality=85, colorspace="bilevel", passthrough=True),
+    RenderOptions(zoom=None, format="jpeg", quality=85, max_width=300, passthrough=True),
+    RenderOptions(format="jpeg", quality=85, passthrough=True, clip=(0, 0, 300, 300)),
+    RenderOptions(format="jpeg", quality=85),
+])
+def test_mismatched_requests_are_rendered(options):
+    jpeg = make_jpeg()
+    record = render_page_batch(one_image_pdf(jpeg), options, [0])[0]
+
+    assert record["image"] != jpeg
+    assert "render" in record["timings"]
+    assert record["mime_type"] == mainpdf.IMAGE_MIME_TYPES[options.format]
+
+
+def test_cache_hit_returns_the_same_bytes(monkeypatch):
+    cache = mainpdf.RenderCache(64 * 1024 * 1024)
+    monkeypatch.setattr(mainpdf, "render_cache", cache)
+    jpeg = make_jpeg()
+    source = one_image_pdf(jpeg)
+    pdf = LoadedPDF(source=source, digest=pdf_digest(source), page_count=1)
+    options = RenderOptions(format="jpeg", quality=85, passthrough=True)
+
+    async def render_twice():
+        first = [record async for record in mainpdf.render_pages(pdf, options)]
+        second = [record async for record in mainpdf.render_pages(pdf, options)]
+        return first, second
+
+    first, second = asyncio.run(render_twice())
+
+    assert cache.hits == 1
+    for records in (first, second):
+        assert records[0]["image"] == jpeg
+        assert records[0]["mime_type"] == "image/jpeg"
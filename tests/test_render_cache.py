@@ -0,0 +1,56 @@
+import asyncio
+
+import mainpdf
+
+OPTIONS = mainpdf.RenderOptions()
+
+
+def key(page_num: int):
+    return ("digest", page_num, OPTIONS)
+
+
+def test_memory_lru_eviction():
+    async def scenario():
+        cache = mainpdf.RenderCache(max_bytes=250)
+        await cache.put(key(0), b"0" * 100)
+        await cache.put(key(1), b"1" * 100)
+        await cache.get(key(0))  # Now page 1 is the least recently used
+        await cache.put(key(2), b"2" * 100)
+        images = [await cache.get(key(page_num)) for page_num in range(3)]
+        return cache, images, await cache.contains_many([key(page_num) for page_num in range(3)])
+
+    cache, images, cached = asyncio.run(scenario())
+
+    assert images[1] is None
+    assert images[0] == b"0" * 100 and images[2] == b"2" * 100
+    assert cache.stats()["bytes"] <= 250
+    assert cached == [True, False, True]
+
+
+def test_disk_tier_serves_evicted_entries(tmp_path):
+    async def scenario():
+        cache = mainpdf.RenderCache(max_bytes=150, disk_dir=str(tmp_path), disk_max_bytes=10_000)
+        await cache.put(key(0), b"0" * 100)
+        await cache.put(key(1), b"1" * 100)  # Evicts page 0 from memory
+        image = await cache.get(key(0))
+        return cache, image, await cache.contains_many([key(1), key(2)])
+
+    cache, image, cached = asyncio.run(scenario())
+
+    assert image == b"0" * 100
+    assert cache.disk_hits == 1
+    # Page 1 is only on disk now; page 2 was never stored
+    assert cached == [True, False]
+
+
+def test_disk_tier_is_trimmed(tmp_path):
+    async def scenario():
+        cache = mainpdf.RenderCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=250)
+        for page_num in range(5):
+            await cache.put(key(page_num), bytes([page_num]) * 100)
+        return cache
+
+    cache = asyncio.run(scenario())
+
+    assert sum(path.stat().st_size for path in tmp_path.iterdir()) <= 250
+    assert cache.stats()["disk_bytes"] <= 250
@@ -0,0 +1,72 @@
+import io
+import json
+import zipfile
+
+import pytest
+from synthetic import make_text_pdf
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.fixture
+def pdf_url(origin):
+    origin.files["/claim.pdf"] = {"body": make_text_pdf(2)}
+    return origin.url + "/claim.pdf"
+
+
+def test_zip_response(client, pdf_url):
+    response = client.post("/convert-pdf-to-png/", json={"pdf_url": pdf_url, "zoom": 0.5, "response_format": "zip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert 'filename="pages.zip"' in response.headers["content-disposition"]
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ["page-1.png", "page-2.png"]
+        assert all(archive.read(name).startswith(PNG_MAGIC) for name in archive.namelist())
+
+
+def test_accept_header_picks_the_format(client, pdf_url):
+    response = client.post("/convert-pdf-to-png/", json={"pdf_url": pdf_url, "zoom": 0.5},
+                           headers={"Accept": "application/zip"})
+    assert response.headers["content-type"] == "application/zip"
+
+
+def test_multipart_response(client, pdf_url):
+    response = client.post("/convert-pdf-to-png/",
+                           json={"pdf_url": pdf_url, "zoom": 0.5, "format": "jpeg", "response_format": "multipart"})
+
+    media_type, _, boundary = response.headers["content-type"].partition("; boundary=")
+    assert media_type == "multipart/mixed" and boundary
+    body = response.content
+    assert body.endswith(f"--{boundary}--\r\n".encode())
+
+    parts = body.split(f"--{boundary}".encode())[1:-1]
+    assert len(parts) == 2
+    for page_number, part in enumerate(parts, start=1):
+        head, _, payload = part.partition(b"\r\n\r\n")
+        assert b"Content-Type: image/jpeg" in head
+        assert f'filename="page-{page_number}.jpg"'.encode() in head
+        assert f"X-Page-Number: {page_number}".encode() in head
+        assert payload.startswith(b"\xff\xd8") and payload.endswith(b"\r\n")
+
+
+def test_ndjson_response(client, pdf_url):
+    response = client.post("/convert-pdf-to-png/", json={"pdf_url": pdf_url, "zoom": 0.5, "response_format": "ndjson"})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["page_number"] for line in lines] == [1, 2]
+    assert all(line["data_url"].startswith("data:image/png;base64,") for line in lines)
+
+
+def test_single_page_binary(client, pdf_url):
+    response = client.get("/convert-pdf-to-png/page/2", params={"pdf_url": pdf_url, "zoom": 0.5, "format": "jpeg"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.content.startswith(b"\xff\xd8")
+
+
+def test_single_page_out_of_range_is_404(client, pdf_url):
+    response = client.get("/convert-pdf-to-png/page/3", params={"pdf_url": pdf_url})
+    assert response.status_code == 404
@@ -0,0 +1,54 @@
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from mainpdf import SpooledPDF
+
+
+def test_small_pdf_stays_in_memory():
+    spool = SpooledPDF(threshold=100)
+    spool.write(b"%PDF-")
+    spool.write(b"1.4")
+
+    source, digest = spool.finish()
+
+    assert source == b"%PDF-1.4"
+    assert digest == hashlib.sha256(b"%PDF-1.4").hexdigest()
+    assert spool.path is None
+
+
+def test_large_pdf_spills_to_a_file_removed_on_close():
+    spool = SpooledPDF(threshold=10)
+    chunks = [b"a" * 8, b"b" * 8, b"c" * 8]
+    for chunk in chunks:
+        spool.write(chunk)
+
+    source, digest = spool.finish()
+
+    assert source == spool.path
+    with open(source, "rb") as f:
+        assert f.read() == b"".join(chunks)
+    assert digest == hashlib.sha256(b"".join(chunks)).hexdigest()
+    spool.close()
+    assert not os.path.exists(source)
+
+
+def test_spill_moves_memory_bytes_to_a_file():
+    spool = SpooledPDF.from_bytes(b"%PDF-1.4")
+    path = spool.spill()
+
+    with open(path, "rb") as f:
+        assert f.read() == b"%PDF-1.4"
+    assert spool.finish()[0] == path
+    spool.close()
+
+
+def test_oversized_pdf_is_413():
+    spool = SpooledPDF(threshold=10, max_size=20)
+    spool.write(b"x" * 15)
+    with pytest.raises(HTTPException) as excinfo:
+        spool.write(b"x" * 15)
+    assert excinfo.value.status_code == 413
+    spool.close()
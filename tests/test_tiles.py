@@ -0,0 +1,39 @@
+import fitz  # PyMuPDF
+import pytest
+
+from mainpdf import MAX_ZOOM, RenderOptions, page_matrix, tile_grid
+
+
+@pytest.fixture
+def letter_page():
+    doc = fitz.open()
+    page = doc.new_page(width=612, height=792)
+    yield page
+    doc.close()
+
+
+def test_grid_covers_the_render(letter_page):
+    grid = tile_grid(letter_page, RenderOptions(zoom=2, tile_size=256))
+    tiles = [tile for tile, _ in grid]
+
+    # 1224 x 1584 pixels
+    assert (tiles[0]["rows"], tiles[0]["cols"]) == (7, 5)
+    assert len(tiles) == 35
+    assert sum(tile["width"] for tile in tiles if tile["row"] == 0) == 1224
+    assert sum(tile["height"] for tile in tiles if tile["col"] == 0) == 1584
+    assert (tiles[-1]["width"], tiles[-1]["height"]) == (200, 48)
+    assert tuple(grid[-1][1].br) == pytest.approx(tuple(letter_page.rect.br))
+
+
+def test_grid_of_a_clip(letter_page):
+    grid = tile_grid(letter_page, RenderOptions(zoom=2, tile_size=256, clip=(100, 100, 200, 200)))
+
+    assert len(grid) == 1
+    tile, clip = grid[0]
+    assert (tile["width"], tile["height"]) == (200, 200)
+    assert tuple(clip) == pytest.approx((100, 100, 200, 200))
+
+
+def test_max_targets_cannot_exceed_max_zoom(letter_page):
+    matrix = page_matrix(letter_page, RenderOptions(zoom=None, max_width=200000))
+    assert matrix.a == MAX_ZOOM